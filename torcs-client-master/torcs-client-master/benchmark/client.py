@@ -0,0 +1,42 @@
+"""Round trip benchmark of the client against the local replay server.
+
+Run from the repository root with ``python -m benchmark.client``.
+"""
+import argparse
+import threading
+
+from pytocl.driver import Driver
+from pytocl.protocol import Client
+from pytocl.server import ReplayServer, load_packets
+
+from benchmark.serializer import SERVER_MESSAGE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--packets', default=None,
+                        help='File with recorded sensor messages, one per line.')
+    parser.add_argument('-n', '--number', type=int, default=5000,
+                        help='Number of messages to replay.')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Messages per second, 0 for as fast as possible.')
+    args = parser.parse_args()
+
+    packets = load_packets(args.packets) if args.packets else \
+        [SERVER_MESSAGE.replace(b'4.052', str(0.02 * i).encode())
+         for i in range(1, args.number + 1)]
+    server = ReplayServer(packets[:args.number], '127.0.0.1', 0,
+                          rate=args.rate, timeout=1)
+
+    reports = []
+    thread = threading.Thread(target=lambda: reports.append(server.serve(5)))
+    thread.start()
+    Client('127.0.0.1', server.address[1], driver=Driver(False)).run()
+    thread.join()
+    server.close()
+
+    print(reports[0])
+
+
+if __name__ == '__main__':
+    main()
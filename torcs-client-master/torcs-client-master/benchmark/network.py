@@ -0,0 +1,62 @@
+"""Microbenchmark of NEAT network activation, node by node and compiled.
+
+Run from the repository root with ``python -m benchmark.network``.
+"""
+import argparse
+import pickle
+
+import neat
+import numpy as np
+
+from benchmark.serializer import measure
+from myneat.CompiledNetwork import CompiledNetwork
+
+
+def cases(genome, config, rows):
+    net = neat.nn.FeedForwardNetwork.create(genome, config)
+    compiled = CompiledNetwork.create(genome, config)
+
+    inputs = np.random.default_rng(0).normal(size=(rows, len(net.input_nodes)))
+    sample = inputs[0].tolist()
+
+    return (
+        ('FeedForwardNetwork.activate',
+         lambda: net.activate(sample)),
+        ('CompiledNetwork.activate',
+         lambda: compiled.activate(sample)),
+        ('FeedForwardNetwork.activate x {}'.format(rows),
+         lambda: [net.activate(row) for row in inputs.tolist()]),
+        ('CompiledNetwork.activateBatch x {}'.format(rows),
+         lambda: compiled.activateBatch(inputs)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('genome', nargs='?', default=None,
+                        help='Pickled genome, a new random one if not given.')
+    parser.add_argument('--config', default='myneat/config',
+                        help='NEAT configuration file.')
+    parser.add_argument('--rows', type=int, default=1000,
+                        help='Samples per batch.')
+    parser.add_argument('-n', '--number', type=int, default=100,
+                        help='Calls per measurement.')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Number of measurements, best one is reported.')
+    args = parser.parse_args()
+
+    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                         neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                         args.config)
+    if args.genome:
+        with open(args.genome, 'rb') as file:
+            genome = pickle.load(file)
+    else:
+        genome = config.genome_type(0)
+        genome.configure_new(config.genome_config)
+
+    measure(cases(genome, config, args.rows), args.number, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
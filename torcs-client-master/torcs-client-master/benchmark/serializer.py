@@ -0,0 +1,75 @@
+"""Microbenchmark of server message encoding and decoding.
+
+Run from the repository root with ``python -m benchmark.serializer``.
+"""
+import argparse
+import timeit
+
+from pytocl.car import State as CarState, Command
+from pytocl.protocol import Serializer, BufferSerializer
+
+SERVER_MESSAGE = \
+    b'(angle 0.008838)(curLapTime 4.052)(damage 0)(distFromStart 1015.56)' \
+    b'(distRaced 42.6238)(fuel 93.9356)(gear 3)(lastLapTime 0)' \
+    b'(opponents 123.4 200 200 200 200 200 200 200 200 200 200 200 200 200 200' \
+    b' 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200' \
+    b' 200 200 200)(racePos 1)(rpm 4509.31)(speedX 81.5135)(speedY 0.40771)' \
+    b'(speedZ -2.4422)(track 4.3701 4.52608 5.02757 6.07753 8.25773 11.1429' \
+    b' 13.451 16.712 21.5022 30.2855 51.8667 185.376 69.9077 26.6353 12.6621' \
+    b' 8.2019 6.5479 5.82979 5.63029)(trackPos 0.126012)' \
+    b'(wheelSpinVel 67.9393 68.8267 71.4009 71.7363)(z 0.336726)' \
+    b'(focus 26.0077 27.9798 30.2855 33.0162 36.3006)\x00'
+
+
+def decode_cases():
+    serializer = Serializer()
+    buffer_serializer = BufferSerializer()
+
+    return (
+        ('Serializer.decode',
+         lambda: serializer.decode(SERVER_MESSAGE)),
+        ('Serializer.decode + CarState',
+         lambda: CarState(serializer.decode(SERVER_MESSAGE))),
+        ('BufferSerializer.decode_values',
+         lambda: buffer_serializer.decode_values(SERVER_MESSAGE)),
+        ('BufferSerializer.decode_state',
+         lambda: buffer_serializer.decode_state(SERVER_MESSAGE)),
+    )
+
+
+def encode_cases():
+    serializer = Serializer()
+
+    command = Command()
+    command.accelerator = 0.2
+    command.gear = 3
+    command.steering = 0.49961099867898606
+
+    return (
+        ('Serializer.encode(actuator_dict)',
+         lambda: serializer.encode(command.actuator_dict)),
+        ('Serializer.encode_command',
+         lambda: serializer.encode_command(command)),
+    )
+
+
+def measure(cases, number, repeat):
+    """Prints best time per call of each case in microseconds."""
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=number, repeat=repeat))
+        print('{:<40} {:8.2f} us'.format(name, best / number * 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--number', type=int, default=10000,
+                        help='Calls per measurement.')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Number of measurements, best one is reported.')
+    args = parser.parse_args()
+
+    measure(decode_cases() + encode_cases(), args.number, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
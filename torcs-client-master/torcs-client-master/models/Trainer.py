@@ -9,7 +9,7 @@ from torch.autograd import Variable
 
 from models.basicnetwork import Net, SteeringNet, BrakingNet
 from models.data import TrainingData
-from pytocl.car import State, MPS_PER_KMH, DEGREE_PER_RADIANS
+from pytocl.car import State, ArrayState, MPS_PER_KMH, DEGREE_PER_RADIANS, SENSOR_SLICES
 
 
 class Trainer:
@@ -24,11 +24,13 @@ class Trainer:
         loss: Callable,
         numberOfEpochs: int,
         learningRate: float,
-        net = None
+        net = None,
+        batchSize: int = 64,
+        numberOfWorkers: int = 0
     ):
 
         if(net is None): net = self.getNetwork()
-        trainingLoss = net.trainNet(data, optimiser, loss, numberOfEpochs, learningRate)
+        trainingLoss = net.trainNet(data, optimiser, loss, numberOfEpochs, learningRate, batchSize, numberOfWorkers)
         modelName = datetime.datetime.now().strftime('%m%d%H%M%S')
         net.save(self.getModelsDir(), modelName)
 
@@ -50,6 +52,9 @@ class Trainer:
     @staticmethod
     def stateToSample(state: State, extended=False) -> Variable:
 
+        if(isinstance(state, ArrayState)):
+            return Variable(Trainer.valuesToSample(state, extended))
+
         if(extended):
 
             # ['angle', 'speedX', 'speedY', 'speedZ', 'track0', 'track1', 'track2', 'track3', 'track4', 'track5', 'track6', 'track7', 'track8', 'track9', 'track10', 'track11', 'track12', 'track13', 'track14', 'track15', 'track16', 'track17', 'track18', 'trackPos', 'wheelSpinVel0', 'wheelSpinVel1', 'wheelSpinVel2', 'wheelSpinVel3', 'z', 'focus0', 'focus1', 'focus2', 'focus3', 'focus4']
@@ -85,6 +90,23 @@ class Trainer:
 
         return Variable(torch.FloatTensor(sample))
 
+    @staticmethod
+    def valuesToSample(state: ArrayState, extended=False) -> torch.FloatTensor:
+
+        values = state.values
+
+        if(extended):
+            # same features as above: speedX up to focus are contiguous raw values
+            sample = torch.empty(1 + len(values) - SENSOR_SLICES['speedX'].start)
+            sample[0] = state.angle
+            sample[1:] = torch.from_numpy(values[SENSOR_SLICES['speedX'].start:])
+
+        else:
+            sample = torch.from_numpy(state.raw('speedX', 'trackPos', 'angle', 'track')).float()
+            sample[0] *= MPS_PER_KMH
+
+        return sample
+
     @staticmethod
     def degToRadians(degree: float) -> float:
         return (degree * math.pi) / 180
@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Callable
+from typing import Callable, Union
 import json
 
 import datetime
@@ -7,7 +7,7 @@ import matplotlib.pyplot as plt
 import torch
 import torch.nn.functional as F
 from torch.autograd import Variable
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, BatchSampler, RandomSampler, IterableDataset
 
 from models.data import SteeringTrainingData, TrainingData
 
@@ -30,16 +30,31 @@ class Net(torch.nn.Module):
         return x
 
     def trainNet(self,
-         data: TrainingData,
+         data: Union[TrainingData, IterableDataset],
          optimiserFunction: Callable = torch.optim.SGD,
          lossFunction: Callable = F.mse_loss,
          numberOfEpochs: int = 2,
-         learningRate: float = 0.001
+         learningRate: float = 0.001,
+         batchSize: int = 64,
+         numberOfWorkers: int = 0
     ) -> list:
 
         optimiser = optimiserFunction(self.parameters(), lr=learningRate)
 
-        dataLoader = DataLoader(data, shuffle=True)
+        if(isinstance(data, IterableDataset)):
+            # streamed data comes in shuffled batches, sharded across the workers:
+            data.batchSize = batchSize
+            dataLoader = DataLoader(data, batch_size=None, num_workers=numberOfWorkers, pin_memory=False)
+
+        else:
+            # shuffled batches of indices, each fetched from the data's tensors at once:
+            dataLoader = DataLoader(
+                data,
+                sampler=BatchSampler(RandomSampler(data), batchSize, drop_last=False),
+                batch_size=None,
+                num_workers=numberOfWorkers,
+                pin_memory=False
+            )
 
         losses = []
         modelName = datetime.datetime.now().strftime('%m%d%H%M%S')
@@ -59,11 +74,12 @@ class Net(torch.nn.Module):
 
                 outputs = self(inputs)
                 loss = lossFunction(outputs, targets)
-                totalLoss += loss
+                # sum of sample losses, as with one sample per step:
+                totalLoss += loss.item() * len(inputs)
                 loss.backward()
                 optimiser.step()
 
-            losses.append(totalLoss.data.numpy()[0])
+            losses.append(totalLoss)
 
 
             self.save('models/models/', modelName)
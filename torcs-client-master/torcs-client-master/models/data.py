@@ -1,13 +1,23 @@
 from abc import abstractmethod
+import multiprocessing
+import time
 
 import torch
 import math
 
+import numpy as np
+import pandas
 from pandas import DataFrame
 from torch.utils.data import Dataset
 
 
 class TrainingData(Dataset):
+    """
+    Data and targets are collected as float32 arrays per appended chunk, so appending
+    never copies what was collected before. On first access the chunks are concatenated
+    once into contiguous tensors. Items are rows of these tensors, indexing with a list
+    or tensor of indices returns a whole batch.
+    """
 
     @abstractmethod
     def getTargetColumns(self) -> list:
@@ -20,24 +30,84 @@ class TrainingData(Dataset):
         return ['SPEED', 'TRACK_POSITION', 'ANGLE_TO_TRACK_AXIS'] + ['TRACK_EDGE_' + str(i) for i in range(19)]
 
     def __init__(self, dataframe: DataFrame = None):
-        self.targets = DataFrame()
-        self.data = DataFrame()
+        # data and target arrays of each appended chunk:
+        self.chunks = []
+        self.rows = 0
+        # data and target tensors, None until materialized:
+        self.tensors = None
 
         if(dataframe is not None): self.append(dataframe)
 
     def append(self, dataframe: DataFrame):
+        self.appendArrays(*self.toArrays(dataframe))
+
+    def toArrays(self, dataframe: DataFrame) -> (np.ndarray, np.ndarray):
         dataframe = self.transformData(dataframe)
         dataframe['ANGLE_TO_TRACK_AXIS'] = dataframe['ANGLE_TO_TRACK_AXIS'] * math.pi / 180
 
-        dataframe.index = range(self.__len__(), self.__len__() + len(dataframe))
-        self.targets = self.targets.append(dataframe.loc[:, self.getTargetColumns()])
-        self.data = self.data.append(dataframe.loc[:, self.getDataColumns()])
+        return (
+            dataframe.loc[:, self.getDataColumns()].to_numpy(dtype=np.float32, copy=True),
+            dataframe.loc[:, self.getTargetColumns()].to_numpy(dtype=np.float32, copy=True)
+        )
+
+    def appendArrays(self, data: np.ndarray, targets: np.ndarray):
+        self.chunks.append((data, targets))
+        self.rows += len(data)
+        self.tensors = None
+
+    def appendFiles(self, paths: list, numberOfWorkers: int = None):
+        """Appends CSV files in order, parsed in parallel by a pool of processes."""
+
+        report = []
+        with multiprocessing.Pool(numberOfWorkers) as pool:
+            for path, (data, targets), seconds in pool.imap(loadFile, [(type(self), path) for path in paths]):
+                self.appendArrays(data, targets)
+                report.append((path, len(data), seconds, data.nbytes + targets.nbytes))
+
+        for path, rows, seconds, size in report:
+            print('{}: {} rows in {:.2f}s, {:.1f} MB'.format(path, rows, seconds, size / 2 ** 20))
+
+        return report
+
+    def materialize(self) -> (torch.FloatTensor, torch.FloatTensor):
+
+        if(self.tensors is None):
+            if(len(self.chunks) == 0):
+                self.appendArrays(
+                    np.empty((0, len(self.getDataColumns())), dtype=np.float32),
+                    np.empty((0, len(self.getTargetColumns())), dtype=np.float32)
+                )
+
+            if(len(self.chunks) > 1):
+                data = np.concatenate([chunk[0] for chunk in self.chunks])
+                targets = np.concatenate([chunk[1] for chunk in self.chunks])
+                self.chunks = [(data, targets)]
+
+            # a single chunk is used as it is, memory mapped arrays stay on disk:
+            data, targets = self.chunks[0]
+
+            self.tensors = (torch.from_numpy(data), torch.from_numpy(targets))
+
+        return self.tensors
 
     def __len__(self):
-        return len(self.data.index)
+        return self.rows
+
+    def __getitem__(self, item) -> (torch.FloatTensor, torch.FloatTensor):
+        data, targets = self.materialize()
+
+        if(isinstance(item, list)): item = torch.as_tensor(item)
+        return data[item], targets[item]
+
+
+def loadFile(job: tuple) -> (str, tuple, float):
+    """Arrays of one CSV file for `appendFiles` with the seconds taken to read them, in a worker process."""
+
+    dataClass, path = job
 
-    def __getitem__(self, item: int) -> (torch.FloatTensor, torch.FloatTensor):
-        return torch.FloatTensor(list(self.data.loc[item, :].values)), torch.FloatTensor(list(self.targets.loc[item, :].values))
+    start = time.perf_counter()
+    arrays = dataClass().toArrays(pandas.read_csv(path))
+    return path, arrays, time.perf_counter() - start
 
 
 class SteeringTrainingData(TrainingData):
@@ -1,54 +1,149 @@
+import argparse
+import multiprocessing
 import os
-
-from pandas import DataFrame, Series
-from torch.utils.data import Dataset
 import sqlite3
+import time
+
+import numpy as np
+
+from pytocl.protocol import BufferSerializer
 
-observation = {}
+# keys of the extended log lines, command followed by car state, with their number of values:
+LAYOUT = (
+    ('accel', 1),
+    ('brake', 1),
+    ('gear', 1),
+    ('gear2', 1),
+    ('steer', 1),
+    ('clutch', 1),
+    ('curTime', 1),
+    ('angle', 1),
+    ('curLapTime', 1),
+    ('damage', 1),
+    ('distFromStart', 1),
+    ('distRaced', 1),
+    ('fuel', 1),
+    ('lastLapTime', 1),
+    ('racePos', 1),
+    ('opponents', 36),
+    ('rpm', 1),
+    ('speedX', 1),
+    ('speedY', 1),
+    ('speedZ', 1),
+    ('track', 19),
+    ('trackPos', 1),
+    ('wheelSpinVel', 4),
+    ('z', 1),
+    ('focus', 5),
+)
+
+# one column per value, numbered for keys with more than one:
 keys = [
-    'accel', 'brake', 'gear', 'gear2', 'steer', 'clutch', 'curTime', 'angle', 'curLapTime', 'damage', 'distFromStart', 'distRaced', 'fuel', 'lastLapTime', 'racePos', 'opponents0', 'opponents1', 'opponents2', 'opponents3', 'opponents4', 'opponents5', 'opponents6', 'opponents7', 'opponents8', 'opponents9', 'opponents10', 'opponents11', 'opponents12', 'opponents13', 'opponents14', 'opponents15', 'opponents16', 'opponents17', 'opponents18', 'opponents19', 'opponents20', 'opponents21', 'opponents22', 'opponents23', 'opponents24', 'opponents25', 'opponents26', 'opponents27', 'opponents28', 'opponents29', 'opponents30', 'opponents31', 'opponents32', 'opponents33', 'opponents34', 'opponents35', 'rpm', 'speedX', 'speedY', 'speedZ', 'track0', 'track1', 'track2', 'track3', 'track4', 'track5', 'track6', 'track7', 'track8', 'track9', 'track10', 'track11', 'track12', 'track13', 'track14', 'track15', 'track16', 'track17', 'track18', 'trackPos', 'wheelSpinVel0', 'wheelSpinVel1', 'wheelSpinVel2', 'wheelSpinVel3', 'z', 'focus0', 'focus1', 'focus2', 'focus3', 'focus4'
+    key + str(i) if count > 1 else key
+    for key, count in LAYOUT
+    for i in range(count)
 ]
 
-db = sqlite3.connect('training-data/trainingData.db')
+# rows written per executemany call:
+BATCH_SIZE = 50000
+
+
+def parseFile(path: str) -> np.ndarray:
+    """Values of all lines of an extended log file, one row per line in column order of `keys`."""
+
+    serializer = BufferSerializer(LAYOUT)
+
+    with open(path, 'rb') as file:
+        lines = [line for line in file.read().splitlines() if line.strip()]
+
+    rows = np.empty((len(lines), len(keys)))
+    for i, line in enumerate(lines):
+        rows[i] = serializer.decode_values(line)
+
+    return rows
+
+
+def parseJob(path: str) -> (str, np.ndarray, float):
+
+    start = time.perf_counter()
+    rows = parseFile(path)
+    return path, rows, time.perf_counter() - start
+
+
+def createTable(db: sqlite3.Connection):
+
+    db.execute('DROP TABLE IF EXISTS observations')
+    db.execute('CREATE TABLE observations (track TEXT, ' + ', '.join(key + ' REAL' for key in keys) + ')')
+
+
+def createIndexes(db: sqlite3.Connection):
+
+    db.execute('CREATE INDEX observations_track ON observations (track)')
+    db.execute('CREATE INDEX observations_time ON observations (curTime)')
+
+
+def load(directory: str = 'training-data/extended/', path: str = 'training-data/trainingData.db',
+         numberOfWorkers: int = None) -> int:
+    """
+    Replaces the observations table by the lines of all log files in the directory, with the
+    file name as track. Files are parsed in a pool of processes, rows are inserted in a single
+    transaction and indexes built after all rows are in. Returns the number of rows inserted.
+    """
+
+    fileNames = sorted(os.listdir(directory))
 
-sql = 'DROP TABLE IF EXISTS observations'
-db.execute(sql)
-db.commit()
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode = WAL')
+    db.execute('PRAGMA synchronous = NORMAL')
 
-sql = 'CREATE TABLE observations (track'
-for key in keys:
-    sql += (', ' + key)
-sql += ');'
+    sqlInsert = 'INSERT INTO observations (track, ' + ', '.join(keys) + ') VALUES (' + ', '.join('?' * (len(keys) + 1)) + ')'
+    numberOfRows = 0
 
-db.execute(sql)
-db.commit()
+    with db:
+        createTable(db)
 
-for fileName in os.listdir('training-data/extended/'):
+        with multiprocessing.Pool(numberOfWorkers) as pool:
+            jobs = [os.path.join(directory, fileName) for fileName in fileNames]
 
-    with open('training-data/extended/' + fileName) as file:
-        lines = file.readlines()
+            for fileName, (_, rows, seconds) in zip(fileNames, pool.imap(parseJob, jobs)):
+                start = time.perf_counter()
+                for offset in range(0, len(rows), BATCH_SIZE):
+                    db.executemany(
+                        sqlInsert,
+                        ((fileName,) + tuple(row) for row in rows[offset:offset + BATCH_SIZE].tolist())
+                    )
+                numberOfRows += len(rows)
 
-    print('Reading ' + fileName)
+                print('{}: {} rows parsed in {:.2f}s, inserted in {:.2f}s'.format(
+                    fileName, len(rows), seconds, time.perf_counter() - start))
 
-    for line in lines:
-        line = line.strip()[1:-1]
+        createIndexes(db)
 
-        sqlInsert = 'INSERT INTO observations (track, '
-        sqlValues = "VALUES ('" + fileName + "', "
+    db.close()
+    return numberOfRows
 
-        for tuple in line.split(')('):
-            valueList = tuple.split()
-            key = valueList.pop(0)
 
-            if len(valueList) == 1:
-                sqlInsert += key + ', '
-                sqlValues += valueList[0] + ', '
-            else:
-                for i, value in enumerate(valueList):
-                    sqlInsert += key + str(i) + ', '
-                    sqlValues += value + ', '
+if __name__ == '__main__':
 
-        sql = sqlInsert[:-2] + ') ' + sqlValues[:-2] + ')'
-        db.execute(sql)
+    parser = argparse.ArgumentParser(description='Loads extended log files into the observations table.')
+    parser.add_argument(
+        '--directory',
+        help='Directory of the extended log files, one per track.',
+        default='training-data/extended/'
+    )
+    parser.add_argument(
+        '--database',
+        help='SQLite database to write the observations table to.',
+        default='training-data/trainingData.db'
+    )
+    parser.add_argument(
+        '--workers',
+        help='Processes parsing log files, one per CPU by default.',
+        type=int,
+        default=None
+    )
+    args = parser.parse_args()
 
-    db.commit()
\ No newline at end of file
+    start = time.perf_counter()
+    numberOfRows = load(args.directory, args.database, args.workers)
+    print('{} rows loaded in {:.2f}s'.format(numberOfRows, time.perf_counter() - start))
@@ -1,39 +1,81 @@
 from abc import abstractmethod
 
+import hashlib
+import os
 import sqlite3
 
+import numpy as np
 import torch
-from pandas import DataFrame
 from torch.utils.data import Dataset
 
 from models.data import TrainingData
 
+# rows fetched from the database at once while exporting to the cache:
+FETCH_SIZE = 50000
 
-class ExtendedData(TrainingData):
-
-    def __init__(self, track='alpine_1'):
-
-        db = sqlite3.connect('training-data/trainingData.db')
 
-        sqlData = 'SELECT ' \
-                  + list2list(self.getDataColumns()) \
-                  + ' FROM observations'
-                  # + ' FROM observations WHERE track = \'' + track + '\''
-
-        sqlTarget = 'SELECT ' \
-                  + list2list(self.getTargetColumns()) \
-                  + ' FROM observations'
-                  # + ' FROM observations WHERE track = \'' + track + '\''
+class ExtendedData(TrainingData):
+    """
+    Data and targets of the observations table, of one track or all tracks.
+
+    The selected columns are exported once to .npy files in `cacheDirectory`, named by a hash
+    of the query, the track and the database's modification time, so loading the database
+    again invalidates them. Later runs map these files into memory instead of querying.
+    """
+
+    def __init__(self, track: str = None, path: str = 'training-data/trainingData.db',
+                 cacheDirectory: str = 'training-data/cache/'):
+
+        super().__init__()
+
+        sql = 'SELECT ' \
+              + list2list(self.getDataColumns() + self.getTargetColumns()) \
+              + ' FROM observations'
+        if(track is not None):
+            sql += ' WHERE track = ?'
+            createTrackIndex(path)
+
+        key = hashlib.sha1('{}|{}|{}'.format(sql, track, os.stat(path).st_mtime_ns).encode()).hexdigest()
+        dataPath = os.path.join(cacheDirectory, key + '-data.npy')
+        targetPath = os.path.join(cacheDirectory, key + '-targets.npy')
+
+        if(not os.path.exists(dataPath) or not os.path.exists(targetPath)):
+            os.makedirs(cacheDirectory, exist_ok=True)
+            self.export(path, sql, () if track is None else (track,), dataPath, targetPath)
+
+        # copy on write, pages are read from disk on first access only:
+        self.appendArrays(np.load(dataPath, mmap_mode='c'), np.load(targetPath, mmap_mode='c'))
+
+    def export(self, path: str, sql: str, parameters: tuple, dataPath: str, targetPath: str):
+        """Writes the query's rows to the .npy files chunk by chunk, never holding all of them in memory."""
+
+        db = sqlite3.connect(path)
+        numberOfRows, = db.execute('SELECT COUNT(*) FROM (' + sql + ')', parameters).fetchone()
+        numberOfColumns = len(self.getDataColumns())
+
+        temporaryData, temporaryTargets = dataPath + '.tmp.npy', targetPath + '.tmp.npy'
+        data = np.lib.format.open_memmap(temporaryData, 'w+', np.float32, (numberOfRows, numberOfColumns))
+        targets = np.lib.format.open_memmap(temporaryTargets, 'w+', np.float32, (numberOfRows, len(self.getTargetColumns())))
+
+        cursor = db.execute(sql, parameters)
+        offset = 0
+        rows = cursor.fetchmany(FETCH_SIZE)
+        while(rows):
+            chunk = np.array(rows, dtype=np.float32)
+            data[offset:offset + len(chunk)] = chunk[:, :numberOfColumns]
+            targets[offset:offset + len(chunk)] = chunk[:, numberOfColumns:]
+            offset += len(chunk)
+            rows = cursor.fetchmany(FETCH_SIZE)
 
-        self.data = DataFrame(db.execute(
-            sqlData
-        ).fetchall())
+        db.close()
 
-        self.targets = DataFrame(db.execute(
-            sqlTarget
-        ).fetchall())
+        data.flush()
+        targets.flush()
+        del data, targets
 
-        db.close()
+        # files appear complete or not at all:
+        os.replace(temporaryData, dataPath)
+        os.replace(temporaryTargets, targetPath)
 
     # def __getitem__(self, index):
     #     return torch.FloatTensor(list(self.data.loc[index, :].values)), torch.FloatTensor(list(self.targets.loc[index, :].values))
@@ -57,6 +99,13 @@ class ExtendedBrakingData(ExtendedData):
     def getTargetColumns(self) -> []:
         return ['brake']
 
+def createTrackIndex(path: str):
+
+    # track filter without a full table scan, for databases loaded before indexes were built:
+    db = sqlite3.connect(path)
+    db.execute('CREATE INDEX IF NOT EXISTS observations_track ON observations (track)')
+    db.close()
+
 def list2list(list: []) -> str:
 
     string = ''
@@ -0,0 +1,119 @@
+from abc import abstractmethod
+
+import sqlite3
+
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+from models.data_extended import ExtendedBrakingData, ExtendedSteeringData, list2list
+
+
+class StreamingData(IterableDataset):
+    """
+    Data and targets of the observations table, read in chunks while iterating, for
+    tables larger than memory. Each iteration is one epoch of shuffled batches.
+
+    Chunks are ranges of `chunkSize` row ids, read in random order. Their rows pass a
+    shuffle buffer of `bufferSize` rows: once full, the buffer is permuted and its first
+    half yielded in batches of `batchSize`, so memory stays bounded by the buffer. With
+    several DataLoader workers, each reads its own share of the chunks.
+    """
+
+    def __init__(self, track: str = None, path: str = 'training-data/trainingData.db',
+                 chunkSize: int = 10000, bufferSize: int = 200000, batchSize: int = 64):
+        self.track = track
+        self.path = path
+        self.chunkSize = chunkSize
+        self.bufferSize = bufferSize
+        self.batchSize = batchSize
+
+    @abstractmethod
+    def getDataColumns(self) -> list:
+        pass
+
+    @abstractmethod
+    def getTargetColumns(self) -> list:
+        pass
+
+    def __iter__(self):
+
+        info = get_worker_info()
+        if(info is None):
+            worker, numberOfWorkers = 0, 1
+            # varies per epoch, reproducible with torch.manual_seed:
+            seed = torch.randint(2 ** 62, ()).item()
+        else:
+            worker, numberOfWorkers, seed = info.id, info.num_workers, info.seed
+        random = np.random.default_rng(seed)
+
+        db = sqlite3.connect(self.path)
+        try:
+            yield from self.batches(self.readChunks(db, worker, numberOfWorkers, random), random)
+        finally:
+            db.close()
+
+    def readChunks(self, db: sqlite3.Connection, worker: int, numberOfWorkers: int, random: np.random.Generator):
+
+        first, last = db.execute('SELECT MIN(rowid), MAX(rowid) FROM observations').fetchone()
+        if(first is None): return
+
+        starts = np.arange(first, last + 1, self.chunkSize)[worker::numberOfWorkers]
+        random.shuffle(starts)
+
+        sql = 'SELECT ' \
+              + list2list(self.getDataColumns() + self.getTargetColumns()) \
+              + ' FROM observations WHERE rowid BETWEEN ? AND ?'
+        if(self.track is not None): sql += ' AND track = ?'
+
+        for start in starts.tolist():
+            parameters = (start, start + self.chunkSize - 1) + (() if self.track is None else (self.track,))
+            rows = db.execute(sql, parameters).fetchall()
+            if(rows): yield np.array(rows, dtype=np.float32)
+
+    def batches(self, chunks, random: np.random.Generator):
+
+        numberOfColumns = len(self.getDataColumns()) + len(self.getTargetColumns())
+        bufferSize = max(self.bufferSize, 2 * self.batchSize)
+        buffer = np.empty((bufferSize, numberOfColumns), dtype=np.float32)
+        filled = 0
+
+        for chunk in chunks:
+            offset = 0
+            while(offset < len(chunk)):
+                count = min(bufferSize - filled, len(chunk) - offset)
+                buffer[filled:filled + count] = chunk[offset:offset + count]
+                filled += count
+                offset += count
+
+                if(filled == bufferSize):
+                    buffer[:] = buffer[random.permutation(bufferSize)]
+                    # whole batches from the first half, the rest stays for mixing with later chunks:
+                    emitted = bufferSize // 2 // self.batchSize * self.batchSize
+                    yield from self.split(buffer[:emitted])
+                    buffer[:bufferSize - emitted] = buffer[emitted:].copy()
+                    filled = bufferSize - emitted
+
+        yield from self.split(buffer[:filled][random.permutation(filled)])
+
+    def split(self, rows: np.ndarray):
+
+        numberOfDataColumns = len(self.getDataColumns())
+        for start in range(0, len(rows), self.batchSize):
+            batch = rows[start:start + self.batchSize]
+            yield (
+                torch.from_numpy(np.ascontiguousarray(batch[:, :numberOfDataColumns])),
+                torch.from_numpy(np.ascontiguousarray(batch[:, numberOfDataColumns:]))
+            )
+
+
+class StreamingSteeringData(StreamingData):
+
+    getDataColumns = ExtendedSteeringData.getDataColumns
+    getTargetColumns = ExtendedSteeringData.getTargetColumns
+
+
+class StreamingBrakingData(StreamingData):
+
+    getDataColumns = ExtendedBrakingData.getDataColumns
+    getTargetColumns = ExtendedBrakingData.getTargetColumns
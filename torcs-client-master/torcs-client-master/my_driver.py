@@ -1,9 +1,12 @@
 import pickle
 import math
 import neat
+import numpy as np
 
 from pytocl.driver import Driver
-from pytocl.car import State, Command, DEGREE_PER_RADIANS, MPS_PER_KMH
+from pytocl.car import State, ArrayState, Command, DEGREE_PER_RADIANS, MPS_PER_KMH, SENSOR_SLICES
+from roadmap import Roadmap
+from myneat.CompiledNetwork import CompiledNetwork
 
 
 class MyDriver(Driver):
@@ -19,9 +22,7 @@ class MyDriver(Driver):
     offtrack = 0
     recovering = False
 
-    roadmap = []
-
-    def __init__(self, net):
+    def __init__(self, net, roadmapFile: str = 'roadmap', roadmapFlushInterval: float = 5.0):
 
         config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
                              neat.DefaultSpeciesSet, neat.DefaultStagnation,
@@ -32,15 +33,32 @@ class MyDriver(Driver):
         else:
             with open('winner-neat', 'rb') as file:
                 pickled = pickle.load(file)
-                self.net = neat.nn.FeedForwardNetwork.create(pickled, config)
+                self.net = CompiledNetwork.create(pickled, config)
                 
         self.state = 'normal'
 
-        with open('roadmap', 'wb') as file:
-            pickle.dump([], file)
+        self.roadmap = Roadmap(roadmapFile, roadmapFlushInterval)
 
         self.speedup = None
 
+        # network inputs of the current tick, filled from the raw sensor values of an ArrayState:
+        self.sample = np.empty(3 + SENSOR_SLICES['track'].stop - SENSOR_SLICES['track'].start)
+
+    def on_restart(self):
+
+        # the roadmap holds the steering of this race's net, the next race may be driven by another:
+        self.roadmap.clear()
+        self.timeSinceLastShift = 0
+        self.offtrack = 0
+        self.recovering = False
+        self.state = 'normal'
+        self.speedup = None
+        super().on_restart()
+
+    def on_shutdown(self):
+        self.roadmap.close()
+        super().on_shutdown()
+
     def drive(self, carstate: State) -> Command:
 
         if self.speedup is None:
@@ -81,14 +99,11 @@ class MyDriver(Driver):
 
         command.brake = 0
 
-        interval = 10
+        interval = self.roadmap.segmentLength
         position = math.floor(int(carstate.distance_from_start) / interval)
 
-        with open('roadmap', 'rb') as file:
-            self.roadmap = pickle.load(file)
-
         if self.speedup and position + 1 < len(self.roadmap):
-            if max(self.roadmap[position:position + int(200 / interval)]) < 0.1 and carstate.speed_x < 180:
+            if self.roadmap.maxAhead(position, 200) < 0.1 and carstate.speed_x < 180:
                 command.accelerator = 1
             else:
                 if carstate.speed_x > 80:
@@ -99,8 +114,6 @@ class MyDriver(Driver):
         if len(self.roadmap) == position and int(carstate.distance_from_start) % interval == 0:
             self.roadmap.append(abs(command.steering))
             print('Pos: {}, len(RM): {}'.format(position, len(self.roadmap)))
-            with open('roadmap', 'wb') as file:
-                pickle.dump(self.roadmap, file)
 
         print('brake: {}, acc: {}, steering: {}'.format(command.brake, command.accelerator, command.steering))
 
@@ -108,6 +121,16 @@ class MyDriver(Driver):
 
     def state2sample(self, carstate: State):
 
+        if isinstance(carstate, ArrayState):
+            # network inputs are raw sensor values, no unit conversion needed. Copied into the
+            # driver's buffer by their slices, which is overwritten next tick:
+            values = carstate.values
+            self.sample[0] = values[SENSOR_SLICES['angle'].start]
+            self.sample[1] = values[SENSOR_SLICES['trackPos'].start]
+            self.sample[2] = values[SENSOR_SLICES['speedX'].start]
+            self.sample[3:] = values[SENSOR_SLICES['track']]
+            return self.sample
+
         sample = []
         sample.append(carstate.angle / DEGREE_PER_RADIANS)
         sample.append(carstate.distance_from_center)
@@ -0,0 +1,248 @@
+"""
+Compact checkpoints of NEAT runs: genomes are stored once by content,
+each generation only records how its population differs from the previous one.
+"""
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import os
+import pickle
+import random
+
+import neat
+from neat.reporting import BaseReporter, ReporterSet
+
+# write the whole population instead of a delta every so many generations:
+FULL_EVERY = 50
+
+
+class CheckpointStore(BaseReporter):
+    """
+    Reporter writing checkpoints into a directory:
+
+    - `objects/<hash>` holds each genome once, gzip-compressed and without fitness, named
+      by the SHA-1 of its pickle. Elites and genomes of species carried over unchanged
+      are therefore stored a single time, however many generations they live.
+    - `generation-<N>.pickle` holds the state to evaluate generation N from: population
+      keys added and removed relative to generation N - 1 (all keys every `fullEvery`
+      generations), the species set, whose genomes are pickled as references to
+      objects and whose reporters are left out, the next node key and the random state.
+    - `best.jsonl` gets one line per evaluated generation with key, object and fitness
+      of its best genome, for `bestGenome` to load it without touching any population.
+      Given `raceFitness(genome)`, e.g. `SuccessiveHalving.raceFitness`, the line also
+      holds that fitness and best genomes are ranked by it instead.
+    - `config.pickle` holds the configuration, written once.
+
+    Unlike `neat.Checkpointer`, which names the population of the next generation after
+    the generation just evaluated, generation N here is the generation evaluated next.
+    """
+    def __init__(self, path: str = 'checkpoints', fullEvery: int = FULL_EVERY, raceFitness=None):
+        self.path = path
+        self.fullEvery = fullEvery
+        self.raceFitness = raceFitness
+        self.generation = None
+        # population keys and objects of the last written generation:
+        self.members = None
+        self.lastSaved = None
+
+        os.makedirs(os.path.join(path, 'objects'), exist_ok=True)
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+
+        entry = {
+            'generation': self.generation,
+            'genome': best_genome.key,
+            'object': self.storeGenome(best_genome),
+            'fitness': best_genome.fitness
+        }
+        if self.raceFitness is not None:
+            entry['raceFitness'] = self.raceFitness(best_genome)
+        with open(os.path.join(self.path, 'best.jsonl'), 'a') as file:
+            file.write(json.dumps(entry) + '\n')
+
+    def end_generation(self, config, population, species_set):
+
+        configPath = os.path.join(self.path, 'config.pickle')
+        if not os.path.exists(configPath):
+            with open(configPath, 'wb') as file:
+                pickle.dump(config, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        generation = self.generation + 1
+        members = {key: self.storeGenome(genome) for key, genome in population.items()}
+
+        if self.members is None or generation % self.fullEvery == 0:
+            base, added, removed = None, members, []
+        else:
+            base = self.lastSaved
+            added = {key: name for key, name in members.items() if self.members.get(key) != name}
+            removed = [key for key in self.members if key not in members]
+
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = lambda obj: self.reference(obj, config)
+        pickler.dump({
+            'generation': generation,
+            'base': base,
+            'added': added,
+            'removed': removed,
+            'species': species_set,
+            'nodeKey': self.nextNodeKey(config),
+            'random': random.getstate()
+        })
+        writeAtomically(self.generationPath(self.path, generation), gzip.compress(buffer.getvalue(), 5))
+
+        self.members = members
+        self.lastSaved = generation
+
+    def reference(self, obj, config):
+        """Persistent id of genomes and reporters, `None` for everything else."""
+
+        if isinstance(obj, config.genome_type):
+            return 'genome', self.storeGenome(obj)
+        if isinstance(obj, ReporterSet):
+            return 'reporters',
+        return None
+
+    @staticmethod
+    def nextNodeKey(config):
+        """Key of the next node neat creates, None before it created any."""
+
+        indexer = config.genome_config.node_indexer
+        if indexer is None:
+            return None
+        key = next(indexer)
+        config.genome_config.node_indexer = itertools.count(key)
+        return key
+
+    def storeGenome(self, genome) -> str:
+        """Writes the genome, without its fitness, unless already stored, and returns its name."""
+
+        fitness = genome.fitness
+        genome.fitness = None
+        try:
+            data = pickle.dumps(genome, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            genome.fitness = fitness
+
+        name = hashlib.sha1(data).hexdigest()
+        path = os.path.join(self.path, 'objects', name)
+        if not os.path.exists(path):
+            writeAtomically(path, gzip.compress(data, 5))
+        return name
+
+    @staticmethod
+    def generationPath(path: str, generation: int) -> str:
+        return os.path.join(path, 'generation-{}.pickle'.format(generation))
+
+    @staticmethod
+    def generations(path: str = 'checkpoints') -> list:
+        """Numbers of the generations a population can be restored for, ascending."""
+
+        prefix, suffix = 'generation-', '.pickle'
+        return sorted(
+            int(name[len(prefix):-len(suffix)]) for name in os.listdir(path)
+            if name.startswith(prefix) and name.endswith(suffix)
+        )
+
+    @staticmethod
+    def restore(path: str = 'checkpoints', generation: int = None) -> neat.Population:
+        """Population to evaluate the generation from, the latest stored one by default."""
+
+        if generation is None:
+            generation = CheckpointStore.generations(path)[-1]
+
+        with open(os.path.join(path, 'config.pickle'), 'rb') as file:
+            config = pickle.load(file)
+
+        objects = ObjectLoader(path)
+
+        # follow deltas back to a full population, then apply them forwards:
+        states = [CheckpointStore.loadState(path, generation, objects)]
+        while states[-1]['base'] is not None:
+            states.append(CheckpointStore.loadState(path, states[-1]['base'], objects))
+
+        members = {}
+        for state in reversed(states):
+            for key in state['removed']:
+                del members[key]
+            members.update(state['added'])
+
+        population = {key: objects.load(name) for key, name in members.items()}
+        random.setstate(states[0]['random'])
+        # config is written once, its node keys would start over at that generation's:
+        nodeKey = states[0]['nodeKey']
+        config.genome_config.node_indexer = None if nodeKey is None else itertools.count(nodeKey)
+
+        species = states[0]['species']
+        restored = neat.Population(config, (population, species, generation))
+        species.reporters = restored.reporters
+        # new reproduction starts counting genome keys at 1, continue after the restored ones:
+        restored.reproduction.genome_indexer = itertools.count(max(population) + 1)
+        return restored
+
+    @staticmethod
+    def loadState(path: str, generation: int, objects: 'ObjectLoader') -> dict:
+
+        def load(reference):
+            return objects.load(reference[1]) if reference[0] == 'genome' else ReporterSet()
+
+        with open(CheckpointStore.generationPath(path, generation), 'rb') as file:
+            unpickler = pickle.Unpickler(io.BytesIO(gzip.decompress(file.read())))
+        unpickler.persistent_load = load
+        return unpickler.load()
+
+    @staticmethod
+    def bestGenome(path: str = 'checkpoints', generation: int = None):
+        """Best genome of the evaluated generation with its fitness, the best of all generations by default."""
+
+        def rank(entry):
+            return entry.get('raceFitness', entry['fitness'])
+
+        best = None
+        with open(os.path.join(path, 'best.jsonl')) as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if generation is None:
+                    if best is None or rank(entry) > rank(best):
+                        best = entry
+                elif entry['generation'] == generation:
+                    best = entry
+
+        if best is None:
+            raise KeyError('No evaluated generation {} in {}.'.format(generation, path))
+
+        genome = ObjectLoader(path).load(best['object'])
+        genome.fitness = best['fitness']
+        return genome
+
+
+class ObjectLoader(object):
+    """Loads genomes from a store's objects on first access, sharing one instance per object."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.loaded = {}
+
+    def load(self, name: str):
+
+        if name not in self.loaded:
+            with open(os.path.join(self.path, 'objects', name), 'rb') as file:
+                self.loaded[name] = pickle.loads(gzip.decompress(file.read()))
+        return self.loaded[name]
+
+
+def writeAtomically(path: str, data: bytes):
+
+    # replace file at once, a crash never leaves a partially written checkpoint:
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(data)
+    os.replace(temporary, path)
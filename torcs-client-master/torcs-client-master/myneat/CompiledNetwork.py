@@ -0,0 +1,140 @@
+"""
+Compiles NEAT feed forward networks into layers of numpy matrices,
+activating all nodes of a layer with one matrix product.
+"""
+import numpy as np
+from neat.activations import sigmoid_activation, tanh_activation, relu_activation, identity_activation
+from neat.aggregations import sum_aggregation
+from neat.nn import FeedForwardNetwork
+
+
+def relu(z: np.ndarray, out: np.ndarray):
+    np.maximum(z, 0.0, out=out)
+
+
+def identity(z: np.ndarray, out: np.ndarray):
+    out[...] = z
+
+
+# neat activation function f(x) = scale * g(factor * x) + offset per vectorized g,
+# given as (factor, g, scale, offset). The clamping of neat does not change any value
+# of tanh, sigmoid(5x) = 0.5 * tanh(2.5x) + 0.5 is used for the same reason:
+ACTIVATIONS = {
+    sigmoid_activation: (2.5, np.tanh, 0.5, 0.5),
+    tanh_activation: (2.5, np.tanh, 1.0, 0.0),
+    relu_activation: (1.0, relu, 1.0, 0.0),
+    identity_activation: (1.0, identity, 1.0, 0.0),
+}
+
+
+class CompiledNetwork(object):
+    """
+    Numpy version of `neat.nn.FeedForwardNetwork`, computing the same outputs up
+    to floating point rounding.
+
+    Values of all nodes are kept in one row per sample: a constant 1 first, then
+    the inputs, followed by the nodes of each layer. A node's layer is one deeper
+    than the deepest node it is connected from, so all nodes of a layer only depend
+    on columns before the layer. Nodes of a layer sharing an activation function
+    form one group with a dense weight matrix over these columns, activating a
+    group is a matrix product and one ufunc writing into the group's columns.
+
+    To get there, a node's column holds g of its activation function written as
+    f(x) = scale * g(factor * x) + offset. Scale and offset are applied by the
+    weights of the nodes reading the column, while bias, response and factor are
+    multiplied into the weights of the node itself, the bias in the row of the
+    constant column. Outputs are scaled and offset once at the end. Only nodes with
+    sum aggregation are supported. Output nodes not connected at all stay 0, like
+    in `activate` of neat.
+    """
+    def __init__(self, numInputs: int, layers: list, outputIndices: list, outputScales: list,
+                 outputOffsets: list, numValues: int):
+        self.numInputs = numInputs
+        # (start, end, weights, activation) per group:
+        self.layers = layers
+        self.outputIndices = np.array(outputIndices, dtype=np.intp)
+        self.outputScales = np.array(outputScales)
+        self.outputOffsets = np.array(outputOffsets)
+        self.numValues = numValues
+        self.values = np.zeros(numValues)
+        self.values[0] = 1.0
+
+    @staticmethod
+    def create(genome, config) -> 'CompiledNetwork':
+        return CompiledNetwork.compile(FeedForwardNetwork.create(genome, config))
+
+    @staticmethod
+    def compile(net: FeedForwardNetwork) -> 'CompiledNetwork':
+        """Compiles a network created by neat, e.g. one loaded from a pickle."""
+
+        depths = {node: 0 for node in net.input_nodes}
+        for node, activation, aggregation, bias, response, links in net.node_evals:
+            if aggregation is not sum_aggregation:
+                raise ValueError('Node {} aggregates with {}, only sum is supported.'.format(node, aggregation))
+            if activation not in ACTIVATIONS:
+                raise ValueError('Node {} activates with unsupported {}.'.format(node, activation))
+            depths[node] = 1 + max((depths[i] for i, w in links), default=0)
+
+        # one group of contiguous columns per layer and activation function:
+        evals = sorted(net.node_evals, key=lambda e: (depths[e[0]], e[1].__name__))
+        groups = []
+        for e in evals:
+            if groups and (depths[groups[-1][0][0]], groups[-1][0][1]) == (depths[e[0]], e[1]):
+                groups[-1].append(e)
+            else:
+                groups.append([e])
+
+        # constant 1, inputs, then nodes ordered by group:
+        columns = {node: column for column, node in enumerate(net.input_nodes, 1)}
+        for node, *_ in evals:
+            columns[node] = len(columns) + 1
+        # scale and offset turning a column into the node's value:
+        transforms = {node: (1.0, 0.0) for node in net.input_nodes}
+        transforms.update({e[0]: ACTIVATIONS[e[1]][2:] for e in evals})
+
+        layers = []
+        for group in groups:
+            start = columns[group[0][0]]
+            factor, activation = ACTIVATIONS[group[0][1]][:2]
+            weights = np.zeros((start, len(group)))
+            for row, (node, _, _, bias, response, links) in enumerate(group):
+                weights[0, row] = factor * bias
+                for i, w in links:
+                    scale, offset = transforms[i]
+                    weights[columns[i], row] += factor * response * w * scale
+                    weights[0, row] += factor * response * w * offset
+            layers.append((start, start + len(group), weights, activation))
+
+        # unconnected outputs read the constant column, scaled to 0:
+        return CompiledNetwork(
+            len(net.input_nodes),
+            layers,
+            [columns.get(node, 0) for node in net.output_nodes],
+            [transforms.get(node, (0.0, 0.0))[0] for node in net.output_nodes],
+            [transforms.get(node, (0.0, 0.0))[1] for node in net.output_nodes],
+            len(columns) + 1
+        )
+
+    def activate(self, inputs) -> list:
+        """Outputs for one sample, as a list like `FeedForwardNetwork.activate`."""
+
+        if len(inputs) != self.numInputs:
+            raise RuntimeError("Expected {0:n} inputs, got {1:n}".format(self.numInputs, len(inputs)))
+
+        values = self.values
+        values[1:self.numInputs + 1] = inputs
+        for start, end, weights, activation in self.layers:
+            activation(values[:start] @ weights, out=values[start:end])
+
+        return (values[self.outputIndices] * self.outputScales + self.outputOffsets).tolist()
+
+    def activateBatch(self, inputs: np.ndarray) -> np.ndarray:
+        """Outputs for each row of inputs, array of shape (rows, outputs)."""
+
+        values = np.empty((len(inputs), self.numValues))
+        values[:, 0] = 1.0
+        values[:, 1:self.numInputs + 1] = inputs
+        for start, end, weights, activation in self.layers:
+            activation(values[:, :start] @ weights, out=values[:, start:end])
+
+        return values[:, self.outputIndices] * self.outputScales + self.outputOffsets
@@ -0,0 +1,104 @@
+"""
+Append-only journal of live evaluation results,
+so a generation interrupted by a crash resumes without racing finished genomes again.
+"""
+import json
+import os
+
+from neat.reporting import BaseReporter
+
+from myneat.FitnessCache import genomeHash
+
+
+class EvaluationJournal(BaseReporter):
+    """
+    Records the fitness of each genome as soon as its evaluation finished, one JSON object
+    per line keyed by generation, genome key and a tag telling evaluations of the same
+    generation apart, e.g. rungs of different budget. Lines are flushed to disk right away.
+
+    Added as reporter to the population, the journal knows the current generation. Evaluation
+    functions wrapped with `wrap` take their results from the journal where present and
+    evaluate only the missing genomes. Entries also hold the genome's structure hash and
+    are only replayed for a genome with the same structure, as genome keys are reused after
+    restoring a checkpoint. A line cut off by a crash is ignored.
+    """
+    def __init__(self, path: str = 'evaluation-journal.jsonl'):
+        self.path = path
+        self.generation = None
+        self.replayed = 0
+
+        self.entries = {}
+        line = '\n'
+        if os.path.exists(path):
+            with open(path) as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[(entry['generation'], entry['genome'], entry['tag'])] = entry
+
+        self.file = open(path, 'a')
+        if not line.endswith('\n'):
+            # end line cut off by a crash, so the next entry starts on its own:
+            self.file.write('\n')
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def lookup(self, genomeID, genome, tag: str = ''):
+        """Journaled fitness of the genome in the current generation, None if not evaluated yet."""
+
+        entry = self.entries.get((self.generation, genomeID, tag))
+        if entry is None or entry['hash'] != genomeHash(genome):
+            return None
+        return entry['fitness']
+
+    def record(self, genomeID, genome, tag: str = ''):
+
+        entry = {
+            'generation': self.generation,
+            'genome': genomeID,
+            'tag': tag,
+            'hash': genomeHash(genome),
+            'fitness': genome.fitness
+        }
+        self.entries[(self.generation, genomeID, tag)] = entry
+
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def wrap(self, evaluate, tag: str = ''):
+        """
+        Journaled version of `evaluate(genomes, config, onResult)`, which has to call
+        `onResult(genomeID, genome)` whenever it set the fitness of a genome.
+        """
+
+        def evaluateJournaled(genomes, config):
+
+            missing = []
+            for genomeID, genome in genomes:
+                fitness = self.lookup(genomeID, genome, tag)
+                if fitness is None:
+                    missing.append((genomeID, genome))
+                else:
+                    genome.fitness = fitness
+
+            replayed = len(genomes) - len(missing)
+            if replayed:
+                self.replayed += replayed
+                print('Evaluation journal: replayed {} of {} evaluations.'.format(replayed, len(genomes)))
+
+            if missing:
+                evaluate(missing, config, onResult=lambda genomeID, genome: self.record(genomeID, genome, tag))
+
+        return evaluateJournaled
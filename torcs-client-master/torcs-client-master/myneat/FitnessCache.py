@@ -0,0 +1,108 @@
+"""
+Caches live fitness per genome structure,
+so genomes surviving unchanged into the next generation are not raced again.
+"""
+import hashlib
+import os
+import pickle
+
+
+def genomeHash(genome) -> str:
+    """
+    Canonical hash of everything a genome's network depends on: enabled connections
+    with weights, and nodes with bias, response, activation and aggregation. Keys are
+    sorted and floats written exactly, so equal networks get equal hashes independent
+    of genome key and insertion order.
+    """
+
+    parts = []
+    for key in sorted(genome.nodes):
+        node = genome.nodes[key]
+        parts.append('n{}:{!r}:{!r}:{}:{}'.format(key, node.bias, node.response, node.activation, node.aggregation))
+    for key in sorted(k for k, c in genome.connections.items() if c.enabled):
+        parts.append('c{}:{}:{!r}'.format(key[0], key[1], genome.connections[key].weight))
+
+    return hashlib.sha1(';'.join(parts).encode()).hexdigest()
+
+
+class FitnessCache(object):
+    """
+    Wraps a `evaluate_genomes(genomes, config)` function, evaluating each genome structure
+    only until `samples` fitness values were recorded for it.
+
+    A genome's fitness is the mean of the recorded values, so more than one sample averages
+    out noisy races. Genomes sharing a structure within a generation are evaluated once.
+    With a `path`, the cache is written to that file after every generation and, with `resume`,
+    loaded from it first, so it survives restoring a checkpoint. Cached values only hold for the
+    run that recorded them: genome structure is all they are keyed by, not config, track or
+    evaluation settings. Hit rates of each generation are passed to
+    `reporters.info` if given, a `neat.reporting.ReporterSet` like `population.reporters`.
+    """
+    def __init__(self, evaluate, samples: int = 1, path: str = None, reporters=None, resume: bool = True):
+        self.evaluate = evaluate
+        self.samples = samples
+        self.path = path
+        self.reporters = reporters
+
+        # fitness values per genome hash:
+        self.entries = {}
+        if resume and path is not None and os.path.exists(path):
+            with open(path, 'rb') as file:
+                self.entries = pickle.load(file)
+
+        self.hits = 0
+        self.lookups = 0
+
+    def evaluate_genomes(self, genomes, config):
+
+        genomes = list(genomes)
+        hashes = {genomeID: genomeHash(genome) for genomeID, genome in genomes}
+
+        # one genome per structure still lacking samples:
+        missing = {}
+        for genomeID, genome in genomes:
+            if len(self.entries.get(hashes[genomeID], ())) < self.samples:
+                missing.setdefault(hashes[genomeID], (genomeID, genome))
+
+        if missing:
+            self.evaluate(list(missing.values()), config)
+            for structure, (genomeID, genome) in missing.items():
+                self.entries.setdefault(structure, []).append(genome.fitness)
+
+        for genomeID, genome in genomes:
+            fitnesses = self.entries[hashes[genomeID]]
+            genome.fitness = sum(fitnesses) / len(fitnesses)
+
+        hits = len(genomes) - len(missing)
+        self.hits += hits
+        self.lookups += len(genomes)
+        self.report('Fitness cache: {} of {} genomes cached ({:.1%}), {:.1%} overall, {} structures known.'.format(
+            hits, len(genomes), hits / len(genomes) if genomes else 0, self.hitRate, len(self.entries)))
+
+        self.save()
+
+    def isCached(self, genome) -> bool:
+        """Whether the genome's fitness is known without evaluating it again."""
+        return len(self.entries.get(genomeHash(genome), ())) >= self.samples
+
+    @property
+    def hitRate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def report(self, line: str):
+
+        if self.reporters is not None:
+            self.reporters.info(line)
+        else:
+            print(line)
+
+    def save(self):
+
+        if self.path is None:
+            return
+
+        # replace file at once, a crash never leaves a partially written cache:
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump(self.entries, file)
+        os.replace(temporary, self.path)
@@ -0,0 +1,144 @@
+"""
+Offline pre-screening of genomes on recorded telemetry,
+so only promising genomes get a live evaluation on the racing server.
+"""
+import sqlite3
+from collections import namedtuple
+
+import numpy as np
+
+from pytocl.analysis import DataLogReader
+from pytocl.car import DEGREE_PER_RADIANS, MPS_PER_KMH
+
+from myneat.CompiledNetwork import CompiledNetwork
+
+# columns of the observations table in the order of `MyDriver.state2sample`:
+NETWORK_INPUT_COLUMNS = ['angle', 'trackPos', 'speedX'] + ['track' + str(i) for i in range(19)]
+
+# share of the track width from the center beyond which the car must steer back:
+EDGE_POSITION = 0.8
+
+Screening = namedtuple('Screening', ['imitationError', 'unsafeRate', 'loss'])
+
+
+def telemetryFromDatabase(path: str = 'training-data/trainingData.db', track: str = None, limit: int = None) -> tuple:
+    """Network inputs and steering of the reference driver from the observations table."""
+
+    sql = 'SELECT ' + ', '.join(NETWORK_INPUT_COLUMNS + ['steer']) + ' FROM observations'
+    parameters = []
+    if track is not None:
+        sql += ' WHERE track = ?'
+        parameters.append(track)
+    if limit is not None:
+        sql += ' LIMIT ?'
+        parameters.append(limit)
+
+    db = sqlite3.connect(path)
+    rows = np.array(db.execute(sql, parameters).fetchall(), dtype=float).reshape(-1, len(NETWORK_INPUT_COLUMNS) + 1)
+    db.close()
+
+    return rows[:, :-1], rows[:, -1]
+
+
+def telemetryFromDriveLog(path: str) -> tuple:
+    """Network inputs and steering of the logging driver from a `DataLogWriter` log."""
+
+    rows = DataLogReader(
+        path,
+        ('angle', 'distance_from_center', 'speed_x', 'distances_from_edge'),
+        ('steering',)
+    ).array
+
+    # first column is the race time, states are logged in converted units:
+    inputs = rows[:, 1:-1]
+    inputs[:, 0] /= DEGREE_PER_RADIANS
+    inputs[:, 2] /= MPS_PER_KMH
+    return inputs, rows[:, -1]
+
+
+def loadTelemetry(path: str, **kwargs) -> tuple:
+    """Telemetry from a drive log (.pickle) or a training database (anything else)."""
+
+    if path.endswith('.pickle'):
+        return telemetryFromDriveLog(path)
+    return telemetryFromDatabase(path, **kwargs)
+
+
+def screen(net, inputs: np.ndarray, steering: np.ndarray, unsafeWeight: float = 1.0) -> Screening:
+    """
+    Scores the steering of a compiled network on all recorded samples at once, lower loss is better.
+
+    The imitation error is the mean absolute difference to the reference driver's steering,
+    the unsafe rate the share of samples near the track edge in which the network steers
+    further outwards (positive steering and track position both point left).
+    """
+
+    predicted = net.activateBatch(inputs)[:, 0] - 0.5
+
+    imitationError = float(np.mean(np.abs(predicted - steering))) if len(steering) else 0.0
+
+    position = inputs[:, 1]
+    nearEdge = np.abs(position) > EDGE_POSITION
+    outwards = nearEdge & (predicted * position > 0)
+    unsafeRate = float(np.count_nonzero(outwards) / np.count_nonzero(nearEdge)) if nearEdge.any() else 0.0
+
+    return Screening(imitationError, unsafeRate, imitationError + unsafeWeight * unsafeRate)
+
+
+class PreScreener(object):
+    """
+    Wraps a `evaluate_genomes(genomes, config)` function, evaluating only genomes passing
+    the offline screening live.
+
+    All genomes of a generation are screened on the telemetry first. The best `keepFraction`
+    of them, at least `minKept`, and only those with a loss of at most `maxLoss` if given, are
+    passed on to the live evaluation. Discarded genomes get a fitness below the worst live
+    fitness of the generation, ordered by their screening loss, so selection still prefers the
+    better imitators among them.
+
+    Genomes for which `bypass(genome)` is true, e.g. those with a cached live fitness
+    (`FitnessCache.isCached`), are passed on without screening and do not count for `keepFraction`.
+    """
+    def __init__(self, evaluate, inputs: np.ndarray, steering: np.ndarray, keepFraction: float = 0.5,
+                 minKept: int = 1, maxLoss: float = None, unsafeWeight: float = 1.0, bypass=None):
+        self.evaluate = evaluate
+        self.bypass = bypass
+        self.inputs = inputs
+        self.steering = steering
+        self.keepFraction = keepFraction
+        self.minKept = minKept
+        self.maxLoss = maxLoss
+        self.unsafeWeight = unsafeWeight
+
+        # screening of each genome of the last generation:
+        self.screenings = {}
+
+    def evaluate_genomes(self, genomes, config):
+
+        genomes = list(genomes)
+        bypassed = [item for item in genomes if self.bypass is not None and self.bypass(item[1])]
+        genomes = [item for item in genomes if item not in bypassed]
+
+        self.screenings = {
+            genomeID: screen(CompiledNetwork.create(genome, config), self.inputs, self.steering, self.unsafeWeight)
+            for genomeID, genome in genomes
+        }
+
+        ranked = sorted(genomes, key=lambda item: self.screenings[item[0]].loss)
+        numKept = max(self.minKept, int(round(self.keepFraction * len(ranked))))
+        kept = [
+            item for rank, item in enumerate(ranked[:numKept])
+            if rank < self.minKept or self.maxLoss is None or self.screenings[item[0]].loss <= self.maxLoss
+        ]
+        discarded = ranked[len(kept):]
+
+        print('Pre-screening kept {} of {} genomes for live evaluation, {} passed unscreened.'.format(
+            len(kept), len(genomes), len(bypassed)))
+
+        kept = bypassed + kept
+        if kept:
+            self.evaluate(kept, config)
+        worst = min((genome.fitness for _, genome in kept), default=0.0)
+
+        for genomeID, genome in discarded:
+            genome.fitness = worst - 1 - self.screenings[genomeID].loss
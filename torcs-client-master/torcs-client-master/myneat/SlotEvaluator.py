@@ -0,0 +1,90 @@
+"""
+Evaluates the genomes of a generation in parallel,
+each evaluation driving on a racing server slot of its own.
+"""
+import functools
+import multiprocessing
+import queue
+from collections import namedtuple
+
+# `serverCommand` starts the slot's race, formatted with the slot, None to use the GUI:
+Slot = namedtuple('Slot', ['index', 'port', 'fitnessFile', 'roadmapFile', 'serverCommand'], defaults=(None,))
+
+
+def getSlots(ports, serverCommand: str = None) -> list:
+    """One slot per server port, each with its own files."""
+    return [
+        Slot(index, port, 'myneat/fitnessFile-{}'.format(port), 'roadmap-{}'.format(port), serverCommand)
+        for index, port in enumerate(ports)
+    ]
+
+
+def evaluateOnSlot(evaluate, genome, config, slot):
+    return evaluate(genome, config, slot)
+
+
+class SlotEvaluator(object):
+    """
+    Spreads genome evaluations over a pool of worker processes, one per slot.
+
+    `evaluate(genome, config, slot)` is called in the worker process and
+    returns an evaluation result with a `fitness` attribute, which is passed
+    back through the pool's pipes. Slots are handed out per evaluation and only
+    returned once its result arrived, so no two evaluations ever share a server
+    port or file, whichever worker runs them, and a worker replaced by the pool
+    needs no slot of its own. Everything a worker needs travels with the task,
+    so the pool works with any start method.
+    """
+    def __init__(self, evaluate, slots, timeout=None):
+        self.evaluate = evaluate
+        self.slots = list(slots)
+        self.timeout = timeout
+        self.results = {}
+
+        self.pool = multiprocessing.Pool(len(self.slots))
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def evaluate_genomes(self, genomes, config, evaluate=None, onResult=None):
+        """
+        Evaluates genomes with `evaluate`, if given instead of the evaluator's one, which has to be picklable.
+        `onResult(genomeID, genome)` is called as soon as a genome's fitness is set, in order of completion.
+        """
+        genomes = list(genomes)
+        waiting = list(range(len(genomes)))
+        freeSlots = list(self.slots)
+
+        # results arrive on the pool's result thread, they are assigned here as they complete:
+        finished = queue.Queue()
+
+        self.results = {}
+        while len(self.results) < len(genomes):
+            while waiting and freeSlots:
+                index, slot = waiting.pop(0), freeSlots.pop(0)
+                self.pool.apply_async(
+                    evaluateOnSlot, (evaluate or self.evaluate, genomes[index][1], config, slot),
+                    callback=functools.partial(self.put, finished, index, slot),
+                    error_callback=functools.partial(self.put, finished, index, slot)
+                )
+
+            index, slot, result = finished.get(timeout=self.timeout)
+            freeSlots.append(slot)
+            if isinstance(result, BaseException):
+                raise result
+
+            genomeID, genome = genomes[index]
+            self.results[genomeID] = result
+            genome.fitness = result.fitness
+            if onResult is not None:
+                onResult(genomeID, genome)
+
+    @staticmethod
+    def put(finished, index, slot, result):
+        finished.put((index, slot, result))
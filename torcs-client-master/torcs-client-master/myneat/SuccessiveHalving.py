@@ -0,0 +1,80 @@
+"""
+Successive halving of a generation's evaluation budget:
+all genomes race briefly, only the best ones race longer.
+"""
+import copy
+from collections import namedtuple
+
+# `evaluate(genomes, config)` setting the fitness of each genome on this rung's budget,
+# `keepFraction` of the genomes promoted to the next rung:
+Rung = namedtuple('Rung', ['evaluate', 'keepFraction'])
+
+# fitness added per rung reached, larger than any race fitness:
+RUNG_OFFSET = 100000.0
+
+
+class SuccessiveHalving(object):
+    """
+    Evaluates a generation in rungs of growing budget, e.g. the first few hundred metres,
+    then a longer distance, then full laps.
+
+    Every genome is evaluated on the first rung, the best `keepFraction` of the genomes of
+    a rung (at least one) are promoted to the next one. Fitness of different budgets is not
+    comparable, so each genome's fitness is its race fitness on the last rung it reached
+    plus `offset` times the index of that rung. With an offset larger than any race fitness,
+    reaching a further rung always counts more than any result on an earlier one, while
+    fitness stays comparable across generations for neat's best genome and stagnation.
+
+    The race fitness of each genome on the last rung it reached is kept in `rawFitness`,
+    the best genome of the last rung over all generations in `bestGenome`, with its race
+    fitness as fitness.
+    """
+    def __init__(self, rungs: list, reporters=None, offset: float = RUNG_OFFSET):
+        self.rungs = rungs
+        self.reporters = reporters
+        self.offset = offset
+
+        # number of genomes evaluated per rung in the last generation:
+        self.evaluated = []
+        # race fitness on the last rung reached per genome key of the last generation:
+        self.rawFitness = {}
+        self.bestGenome = None
+
+    def evaluate_genomes(self, genomes, config):
+
+        candidates = list(genomes)
+        self.evaluated = []
+        self.rawFitness = {}
+
+        for index, rung in enumerate(self.rungs):
+            rung.evaluate(candidates, config)
+            self.evaluated.append(len(candidates))
+
+            scores = [genome.fitness for _, genome in candidates]
+            for (genomeID, genome), score in zip(candidates, scores):
+                self.rawFitness[genomeID] = score
+                genome.fitness = index * self.offset + score
+
+            if index + 1 < len(self.rungs):
+                numPromoted = max(1, int(round(rung.keepFraction * len(candidates))))
+                ranked = sorted(zip(scores, range(len(candidates))), reverse=True)
+                candidates = [candidates[position] for _, position in ranked[:numPromoted]]
+
+        bestID, best = max(candidates, key=lambda candidate: self.rawFitness[candidate[0]])
+        if self.bestGenome is None or self.rawFitness[bestID] > self.bestGenome.fitness:
+            self.bestGenome = copy.deepcopy(best)
+            self.bestGenome.fitness = self.rawFitness[bestID]
+
+        self.report('Successive halving evaluated {} genomes per rung, best race fitness on the last one {} (genome {}).'.format(
+            ' -> '.join(str(count) for count in self.evaluated), self.rawFitness[bestID], bestID))
+
+    def raceFitness(self, genome) -> float:
+        """Race fitness of a genome of the last generation on the last rung it reached."""
+        return self.rawFitness[genome.key]
+
+    def report(self, line: str):
+
+        if self.reporters is not None:
+            self.reporters.info(line)
+        else:
+            print(line)
@@ -1,32 +1,49 @@
+#! /usr/bin/env python3
+import argparse
+import os
 import pickle
-from collections import namedtuple
-
-# from neat.checkpoint import Checkpointer
-
-# population = Checkpointer().restore_checkpoint('neat-checkpoint-222')
-#
-# Dummy = namedtuple('Dummy', ['fitness'])
-#
-# winner = Dummy(fitness=0)
-#
-# for index in population.population.keys():
-#     individual = population.population[index]
-#     print(individual.fitness)
-#     if(individual.fitness and individual.fitness > winner.fitness):
-#         winner = individual
-#
-# with open('winner-neat-full-2', 'wb') as file:
-#     pickle.dump(winner, file)
-
-config = Config(
-    DefaultGenome, DefaultReproduction, DefaultSpeciesSet, DefaultStagnation, 'myneat/config'
-)
-
-with open('winner-neat', 'rb') as file:
-    # unpickler = pickle.Unpickler(file)
-    # pickled = unpickler.load()
-    pickled = pickle.load(file)
-    net = FeedForwardNetwork.create(pickled, config)
-
-with open('winner-neat-net', 'wb') as file:
-    pickle.dump(net, file)
\ No newline at end of file
+import sys
+# repository root, for the myneat package like in run_evolution.py:
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from neat import Config, DefaultGenome, DefaultReproduction, DefaultSpeciesSet, DefaultStagnation
+from neat.nn import FeedForwardNetwork
+
+from myneat.CheckpointStore import CheckpointStore
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Extracts the best genome of a run from its checkpoint directory.')
+    parser.add_argument(
+        '--checkpoints',
+        help='Checkpoint directory written by the run.',
+        default='checkpoints'
+    )
+    parser.add_argument(
+        '--generation',
+        help='Generation to take the best genome of, the best of all generations by default.',
+        type=int,
+        default=None
+    )
+    parser.add_argument(
+        '--output',
+        help='File to write the pickled genome to, e.g. winner-neat to have MyDriver drive it.',
+        default='winner-neat-checkpoint'
+    )
+    args = parser.parse_args()
+
+    config = Config(
+        DefaultGenome, DefaultReproduction, DefaultSpeciesSet, DefaultStagnation, 'myneat/config'
+    )
+
+    # only the best genome's object is read, no population is unpickled:
+    winner = CheckpointStore.bestGenome(args.checkpoints, args.generation)
+    print('Best genome {} with fitness {}.'.format(winner.key, winner.fitness))
+
+    with open(args.output, 'wb') as file:
+        pickle.dump(winner, file)
+
+    with open(args.output + '-net', 'wb') as file:
+        pickle.dump(FeedForwardNetwork.create(winner, config), file)
+
+    print('Written to {0} and, as network, {0}-net.'.format(args.output))
@@ -1,17 +1,58 @@
 import logging
 import math
-from collections import Iterable
+from collections.abc import Iterable
 from functools import partialmethod
 
+import numpy as np
+
 _logger = logging.getLogger(__name__)
 
 DEGREE_PER_RADIANS = 180 / math.pi
 MPS_PER_KMH = 1000 / 3600
 
+# sensor keys of server messages in wire order with their number of values:
+SENSOR_LAYOUT = (
+    ('angle', 1),
+    ('curLapTime', 1),
+    ('damage', 1),
+    ('distFromStart', 1),
+    ('distRaced', 1),
+    ('fuel', 1),
+    ('gear', 1),
+    ('lastLapTime', 1),
+    ('opponents', 36),
+    ('racePos', 1),
+    ('rpm', 1),
+    ('speedX', 1),
+    ('speedY', 1),
+    ('speedZ', 1),
+    ('track', 19),
+    ('trackPos', 1),
+    ('wheelSpinVel', 4),
+    ('z', 1),
+    ('focus', 5),
+)
+
+
+def layout_slices(layout):
+    """Maps each key of a sensor layout to its slice of a flat value array."""
+    slices = {}
+    offset = 0
+    for key, count in layout:
+        slices[key] = slice(offset, offset + count)
+        offset += count
+    return slices
+
+
+SENSOR_SLICES = layout_slices(SENSOR_LAYOUT)
+
 
 class Value:
     """Base class for value objects."""
 
+    # no instance dictionary of its own, so subclasses may declare slots:
+    __slots__ = ()
+
     def __str__(self):
         return '\n'.join(
             '{}: {}'.format(k, v) for k, v in self.__dict__.items()
@@ -128,6 +169,129 @@ class State(Value):
     int_value = partialmethod(converted_value, converter=int)
 
 
+def _scalar_property(key, factor=1.0):
+    index = SENSOR_SLICES[key].start
+
+    def fget(self):
+        return self.values.item(index) * factor
+
+    def fset(self, value):
+        self.values[index] = value / factor
+
+    return property(fget, fset)
+
+
+def _int_property(key):
+    index = SENSOR_SLICES[key].start
+
+    def fget(self):
+        value = self.values.item(index)
+        return None if math.isnan(value) else int(value)
+
+    def fset(self, value):
+        self.values[index] = value
+
+    return property(fget, fset)
+
+
+def _vector_property(key, factor=None):
+    s = SENSOR_SLICES[key]
+
+    def fget(self):
+        if factor is None:
+            return self.values[s]
+        return self.values[s] * factor
+
+    def fset(self, value):
+        self.values[s] = value if factor is None else np.divide(value, factor)
+
+    return property(fget, fset)
+
+
+class ArrayState(Value):
+    """State of car and environment backed by one array of sensor values.
+
+    Offers the attributes of ``State``, read from a flat ``np.float64`` vector
+    of raw sensor values in ``SENSOR_LAYOUT`` order as decoded by
+    ``protocol.BufferSerializer``. Scalars are converted to the units of
+    ``State`` on access, vector attributes are views into ``values`` (except
+    ``wheel_velocities``, which needs a unit conversion). Invalid or unset
+    sensor values are NaN, integer attributes are ``None`` in that case.
+
+    Attributes:
+        values: Raw sensor values as sent by the server. Drivers and feature
+            builders may consume this vector directly.
+        extra: Sensor values of keys not contained in ``SENSOR_LAYOUT`` in
+            string form.
+    """
+
+    __slots__ = ('values', 'extra')
+
+    vector_attributes = frozenset((
+        'opponents',
+        'distances_from_edge',
+        'focused_distances_from_edge',
+        'wheel_velocities',
+    ))
+
+    _indices = {}
+
+    def __init__(self, values, extra=None):
+        self.values = values
+        self.extra = extra or {}
+
+    angle = _scalar_property('angle', DEGREE_PER_RADIANS)
+    current_lap_time = _scalar_property('curLapTime')
+    damage = _int_property('damage')
+    distance_from_start = _scalar_property('distFromStart')
+    distance_raced = _scalar_property('distRaced')
+    fuel = _scalar_property('fuel')
+    gear = _int_property('gear')
+    last_lap_time = _scalar_property('lastLapTime')
+    opponents = _vector_property('opponents')
+    race_position = _int_property('racePos')
+    rpm = _scalar_property('rpm')
+    speed_x = _scalar_property('speedX', MPS_PER_KMH)
+    speed_y = _scalar_property('speedY', MPS_PER_KMH)
+    speed_z = _scalar_property('speedZ', MPS_PER_KMH)
+    distances_from_edge = _vector_property('track')
+    distance_from_center = _scalar_property('trackPos')
+    wheel_velocities = _vector_property('wheelSpinVel', DEGREE_PER_RADIANS)
+    z = _scalar_property('z')
+    focused_distances_from_edge = _vector_property('focus')
+
+    distances_from_egde_valid = State.distances_from_egde_valid
+    focused_distances_from_egde_valid = \
+        State.focused_distances_from_egde_valid
+
+    def raw(self, *keys):
+        """Raw sensor values of given keys, concatenated into a new array."""
+        indices = self._indices.get(keys)
+        if indices is None:
+            indices = np.concatenate([
+                np.arange(SENSOR_SLICES[k].start, SENSOR_SLICES[k].stop)
+                for k in keys
+            ])
+            self._indices[keys] = indices
+        return self.values.take(indices)
+
+    def chain(self, *attributes):
+        """Attribute iterator, unpacking vector attributes."""
+        for name in attributes:
+            if name in self.vector_attributes:
+                yield from getattr(self, name)
+            else:
+                yield getattr(self, name)
+
+    def __str__(self):
+        return '\n'.join(
+            '{}: {}'.format(k, getattr(self, k)) for k in sorted(
+                k for k, v in vars(ArrayState).items()
+                if isinstance(v, property)
+            )
+        )
+
+
 class Command(Value):
     """Command to drive car during next control cycle.
 
@@ -141,6 +305,7 @@ class Command(Value):
             rotation of 21 degrees.
         focus: Direction of driver's focus, resulting in corresponding
             ``State.focused_distances_from_edge``, [-90;90], deg.
+        meta: Request to the server, 0: none, 1: restart race.
     """
 
     def __init__(self):
@@ -149,6 +314,7 @@ class Command(Value):
         self.gear = 0
         self.steering = 0.0
         self.focus = 0.0
+        self.meta = 0
 
     @property
     def actuator_dict(self):
@@ -159,5 +325,5 @@ class Command(Value):
             steer=[self.steering],
             clutch=[0],  # server car does not need clutch control?
             focus=[self.focus],
-            meta=[0]  # no support for server restart via meta=1
+            meta=[self.meta]
         )
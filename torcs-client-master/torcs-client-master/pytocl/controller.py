@@ -115,5 +115,9 @@ class CompositeController(Controller):
     def control(self, deviation, timestamp):
         return sum(c.control(deviation, timestamp) for c in self.controllers)
 
+    def reset(self):
+        for controller in self.controllers:
+            controller.reset()
+
     def __str__(self):
         return ', '.join(str(c) for c in self.controllers)
@@ -42,6 +42,17 @@ class Driver:
         return -90, -75, -60, -45, -30, -20, -15, -10, -5, 0, 5, 10, 15, 20, \
             30, 45, 60, 75, 90
 
+    def on_restart(self):
+        """
+        Server restarted the race.
+
+        Resets the controllers, so no history of the previous race affects
+        the next one. Extend this event handler to reset further state of
+        your driver.
+        """
+        self.steering_ctrl.reset()
+        self.acceleration_ctrl.reset()
+
     def on_shutdown(self):
         """
         Server requested driver shutdown.
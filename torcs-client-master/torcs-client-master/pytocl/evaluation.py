@@ -0,0 +1,140 @@
+"""Outcome of driving a race with a client."""
+from collections import namedtuple
+
+EvaluationResult = namedtuple('EvaluationResult', [
+    'fitness',
+    'lap_time',
+    'distance',
+    'crashed',
+    'stuck',
+    'lap_complete',
+    'ticks',
+    'terminated',
+])
+EvaluationResult.__doc__ = """Evaluation of a driver at the end of a race.
+
+Returned by ``Client.run``. Being a plain named tuple, it can be passed back
+from worker processes through pipes and queues as is.
+
+Attributes:
+    fitness: Fitness computed by ``Client.getFitness``.
+    lap_time: Time of last completed lap, 0 if none completed, s.
+    distance: Distance raced, m.
+    crashed: Whether the car was too far off the track center last.
+    stuck: Whether the car was too slow last, after the first 10 s.
+    lap_complete: Whether a lap was completed.
+    ticks: Number of sensor messages processed.
+    terminated: Reason the ``TerminationPolicy`` ended the evaluation early,
+        ``None`` if it was not ended early.
+"""
+
+
+class TerminationPolicy:
+    """Decides when an evaluation can be ended before the race is over.
+
+    Updated with every car state, the policy returns the reason to end the
+    evaluation once any enabled threshold is exceeded. Thresholds set to
+    ``None`` are disabled. Durations are measured in race time.
+
+    Attributes:
+        max_off_track_time: Time the car may spend off track, s.
+        max_stuck_time: Time the car may drive slower than ``stuck_speed``
+            once ``grace_time`` passed, s.
+        stuck_speed: Speed below which the car counts as stuck, m/s.
+        grace_time: Race time before which the car is never considered stuck
+            or without progress, s.
+        max_damage: Damage points the car may take.
+        min_progress: Distance the car must cover in ``progress_window``, m.
+        progress_window: Time to cover ``min_progress`` in, s.
+        stop_on_lap: Whether to end the evaluation once a lap is completed.
+        max_time: Race time budget of the evaluation, s.
+        max_distance: Distance budget of the evaluation, m.
+        race_time: Race time since the last reset, s.
+    """
+
+    def __init__(self, *,
+                 max_off_track_time=None,
+                 max_stuck_time=None,
+                 stuck_speed=5,
+                 grace_time=10,
+                 max_damage=None,
+                 min_progress=None,
+                 progress_window=10,
+                 stop_on_lap=False,
+                 max_time=None,
+                 max_distance=None):
+        self.max_off_track_time = max_off_track_time
+        self.max_stuck_time = max_stuck_time
+        self.stuck_speed = stuck_speed
+        self.grace_time = grace_time
+        self.max_damage = max_damage
+        self.min_progress = min_progress
+        self.progress_window = progress_window
+        self.stop_on_lap = stop_on_lap
+        self.max_time = max_time
+        self.max_distance = max_distance
+        self.reset()
+
+    def reset(self):
+        """Forgets history, to be called before each evaluation."""
+        self.off_track_time = 0
+        self.stuck_time = 0
+        self.race_time = 0
+        self._last_time = None
+        self._progress_start = None
+
+    def update(self, carstate):
+        """Checks thresholds against the newest car state.
+
+        Returns:
+            Reason to end the evaluation or ``None`` to go on.
+        """
+        time = carstate.current_lap_time
+        elapsed = 0 if self._last_time is None else max(0, time - self._last_time)
+        self._last_time = time
+        self.race_time += elapsed
+
+        if self.max_time is not None and self.race_time > self.max_time:
+            return 'time budget'
+
+        if self.max_distance is not None and \
+                carstate.distance_raced > self.max_distance:
+            return 'distance budget'
+
+        if self.stop_on_lap and carstate.last_lap_time > 0:
+            return 'lap completed'
+
+        # no damage sensor value in the message, damage is None:
+        if self.max_damage is not None and carstate.damage is not None and \
+                carstate.damage > self.max_damage:
+            return 'damage'
+
+        if self.max_off_track_time is not None:
+            if abs(carstate.distance_from_center) > 1:
+                self.off_track_time += elapsed
+                if self.off_track_time > self.max_off_track_time:
+                    return 'off track'
+            else:
+                self.off_track_time = 0
+
+        if self.race_time < self.grace_time:
+            return None
+
+        if self.max_stuck_time is not None:
+            if carstate.speed_x < self.stuck_speed:
+                self.stuck_time += elapsed
+                if self.stuck_time > self.max_stuck_time:
+                    return 'stuck'
+            else:
+                self.stuck_time = 0
+
+        if self.min_progress is not None:
+            distance = carstate.distance_raced
+            if self._progress_start is None:
+                self._progress_start = (self.race_time, distance)
+            elif self.race_time - self._progress_start[0] >= self.progress_window:
+                if distance - self._progress_start[1] < self.min_progress:
+                    return 'no progress'
+                self._progress_start = (self.race_time, distance)
+
+        return None
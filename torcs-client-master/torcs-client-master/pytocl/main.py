@@ -23,6 +23,18 @@ def main(driver):
         type=int,
         default=3001
     )
+    parser.add_argument(
+        '--deadline',
+        help='Answer with a fallback command if the driver takes longer than '
+             'this many seconds.',
+        type=float,
+        default=None
+    )
+    parser.add_argument(
+        '--drain',
+        help='Skip outdated sensor messages queued while the driver was busy.',
+        action='store_true'
+    )
     parser.add_argument('-v', help='Debug log level.', action='store_true')
     args = parser.parse_args()
 
@@ -39,7 +51,7 @@ def main(driver):
 
     # start client loop:
     client = Client(driver=driver, **args.__dict__)
-    client.run()
+    return client.run()
 
 
 if __name__ == '__main__':
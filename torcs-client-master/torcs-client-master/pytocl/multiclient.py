@@ -0,0 +1,155 @@
+"""Driving several cars concurrently from one process with ``asyncio``."""
+import asyncio
+import logging
+
+from pytocl.protocol import Client, State, MSG_IDENTIFIED, TO_SOCKET_SEC
+
+_logger = logging.getLogger(__name__)
+
+
+class CarProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol connecting one ``Client`` to its server port.
+
+    The client's state machine is reused unchanged: registration is retried
+    until the server identifies the driver, then every message is passed to
+    ``Client.handle_message`` and its reply is sent back. Restart and shutdown
+    requests are handled by the client as in its blocking loop, after a
+    restart the driver is registered again.
+
+    Attributes:
+        client (Client): Client holding driver and runtime state of the car.
+        done (asyncio.Future): Resolved when the client stopped.
+    """
+
+    def __init__(self, client, loop):
+        self.client = client
+        self.done = loop.create_future()
+        self.transport = None
+        self._registration = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.client.state = State.STARTING
+        self._start_registration()
+
+    def _start_registration(self):
+        _logger.info('Registering driver client with server {}.'
+                     .format(self.client.hostaddr))
+        self._registration = asyncio.ensure_future(self._register())
+
+    async def _register(self):
+        buffer = self.client.init_message()
+        while self.client.state is State.STARTING:
+            _logger.debug('Sending init buffer {!r}.'.format(buffer))
+            self.transport.sendto(buffer)
+            await asyncio.sleep(TO_SOCKET_SEC)
+
+    def datagram_received(self, data, addr):
+        if self.client.state is State.STARTING:
+            if MSG_IDENTIFIED in data:
+                _logger.info('Connection successful on port {}.'
+                             .format(self.client.hostaddr[1]))
+                self.client.state = State.RUNNING
+            return
+
+        if self.client.state is not State.RUNNING:
+            return
+
+        buffer = self.client.handle_message(data)
+        if buffer is not None:
+            self.transport.sendto(buffer)
+            if self.client.profiler:
+                self.client.profiler.end()
+
+        if self.client.state is State.STARTING:
+            # restarted race, server waits for the init message:
+            self._start_registration()
+        elif self.client.state is State.STOPPING:
+            self.transport.close()
+
+    def error_received(self, exc):
+        _logger.warning('Communication with server {} failed: {}.'.format(
+            self.client.hostaddr, exc
+        ))
+
+    def connection_lost(self, exc):
+        if self._registration:
+            self._registration.cancel()
+        self.client.state = State.STOPPED
+        _logger.info('Client on port {} stopped.'.format(
+            self.client.hostaddr[1]
+        ))
+        if not self.done.done():
+            self.done.set_result(self.client)
+
+
+class ClientManager:
+    """Drives several clients concurrently in one ``asyncio`` event loop.
+
+    Each client keeps its own driver and state machine on its own server port,
+    while all of them share the interpreter, imports and loaded models.
+
+    Attributes:
+        clients (list): Managed ``Client`` instances.
+        protocols (dict): ``CarProtocol`` per port of running clients.
+    """
+
+    def __init__(self, clients=()):
+        self.clients = list(clients)
+        self.protocols = {}
+
+    def add(self, driver, port, hostname='localhost'):
+        """Adds client for given driver on given server port."""
+        client = Client(hostname, port, driver=driver)
+        self.clients.append(client)
+        return client
+
+    def run(self):
+        """Drives all clients until each of them stopped."""
+        asyncio.run(self.run_async())
+        return self.latency_report()
+
+    async def run_async(self):
+        loop = asyncio.get_running_loop()
+
+        for client in self.clients:
+            _, protocol = await loop.create_datagram_endpoint(
+                lambda: CarProtocol(client, loop),
+                remote_addr=client.hostaddr
+            )
+            self.protocols[client.hostaddr[1]] = protocol
+
+        try:
+            await asyncio.gather(*(p.done for p in self.protocols.values()))
+        finally:
+            for protocol in self.protocols.values():
+                if protocol.client.state is State.RUNNING:
+                    protocol.client.stop()
+                protocol.transport.close()
+
+    def latency_report(self):
+        """Tick profiler per port, summary also written to the log."""
+        report = {
+            port: p.client.profiler for port, p in self.protocols.items()
+            if p.client.profiler
+        }
+        for port, profiler in sorted(report.items()):
+            _logger.info(
+                'Port {}: {} ticks, mean {:.3f} ms, max {:.3f} ms, {} deadline '
+                'misses.'.format(
+                    port,
+                    profiler.tick.count,
+                    profiler.tick.mean / 1e6,
+                    profiler.tick.max / 1e6,
+                    profiler.misses
+                )
+            )
+        return report
+
+
+def run_clients(drivers, hostname='localhost', first_port=3001):
+    """Drives given drivers on consecutive server ports from one process."""
+    manager = ClientManager()
+    for port, driver in enumerate(drivers, first_port):
+        manager.add(driver, port, hostname)
+    return manager.run()
@@ -1,9 +1,16 @@
 import enum
 import logging
 import socket
+from operator import itemgetter
 
-from pytocl.car import State as CarState
+import numpy as np
+
+from pytocl.car import State as CarState, ArrayState as ArrayCarState, \
+    Command, SENSOR_LAYOUT
 from pytocl.driver import Driver
+from pytocl.evaluation import EvaluationResult
+from pytocl.timing import TickProfiler
+from pytocl.watchdog import DeadlineDriver
 
 _logger = logging.getLogger(__name__)
 
@@ -16,6 +23,11 @@ MSG_RESTART = b'***restart***'
 TO_SOCKET_SEC = 1
 TO_SOCKET_MSEC = TO_SOCKET_SEC * 1000
 
+# fixed layout of ``Command.actuator_dict`` on the wire, values formatted with
+# ``str`` like ``Serializer.encode`` does:
+COMMAND_TEMPLATE = \
+    '(accel %s)(brake %s)(gear %s)(steer %s)(clutch 0)(focus %s)(meta %s)'
+
 
 class Client:
     """Client for TORCS racing car simulation with SCRC network server.
@@ -27,6 +39,34 @@ class Client:
         serializer (Serializer): Implementation of network data encoding.
         state (State): Runtime state of the client.
         socket (socket): UDP socket to server.
+        profiler (TickProfiler): Timing of control cycles, reported at
+            shutdown. ``None`` if disabled.
+        fitnessFile (str): Optional file the fitness is exported to when the
+            client stops, ``None`` to not write any file.
+        results (list): ``EvaluationResult`` of each race ended by a restart
+            or shutdown, in order. In batch mode one per driver, also for a
+            race ended before any sensor message.
+
+    Passing a ``deadline`` in seconds runs the driver under a
+    ``DeadlineDriver``, answering with a ``fallback`` command whenever the
+    driver does not return in time.
+
+    A ``termination_policy`` ends the evaluation as soon as it fires: the
+    client answers with a race restart request (``meta`` actuator) and stops.
+    ``run_batch`` instead keeps the socket and evaluates the next driver in
+    the restarted race, so one race session serves a whole batch of drivers.
+
+    Like the reference client, the client registers again after each restart
+    message: the server closes the driver's connection on restart and waits
+    for a new ``SCR`` init message before it sends sensor data of the
+    restarted race.
+
+    With ``drain`` enabled, all datagrams queued in the socket are read
+    before answering and only the newest sensor message is processed, so a
+    client that fell behind once catches up instead of acting on stale state.
+    Restart and shutdown messages are always processed, in order. Skipped
+    sensor messages are counted in ``skipped_messages``, the number of
+    messages found queued in ``backlog`` and ``max_backlog``.
     """
 
     def __init__(self,
@@ -34,26 +74,37 @@ class Client:
         port=3001, *,
         driver=None,
         serializer=None,
-        fitnessFile='myneat/fitnessFile'
+        fitnessFile=None,
+        profile=True,
+        deadline=None,
+        fallback='last',
+        drain=False,
+        termination_policy=None
     ):
 
         self.hostaddr = (hostname, port)
-        self.driver = driver or Driver()
-        self.serializer = serializer or Serializer()
+        self.deadline = deadline
+        self.fallback = fallback
+        self._set_driver(driver or Driver())
+        self.serializer = serializer or BufferSerializer()
         self.state = State.STOPPED
         self.socket = None
+        self.profiler = TickProfiler() if profile else None
 
-        self.evaluation = {
-            'crashed': False,
-            'stuck': False,
-            'fitness': 0,
-            'time': 0,
-            'avgSpeed': 0,
-            'position': 0,
-            'steering': 0,
-            'iteration': 1,
-            'lapComplete': False
-        }
+        self.termination_policy = termination_policy
+
+        self.drain = drain
+        self.skipped_messages = 0
+        self.backlog = 0
+        self.max_backlog = 0
+
+        # drivers still to evaluate in a batch, None if not in batch mode:
+        self._drivers = None
+        self.restart_requested = False
+        self._awaiting_restart = False
+
+        self.results = []
+        self._reset_evaluation()
 
         self.priorities = {
             'speed': 5,
@@ -71,43 +122,101 @@ class Client:
             ''.format(s=self)
 
     def run(self):
-        """Enters cyclic execution of the client network interface."""
+        """Enters cyclic execution of the client network interface.
+
+        Returns:
+            ``EvaluationResult`` of the race.
+        """
 
         if self.state is State.STOPPED:
             _logger.debug('Starting cyclic execution.')
 
-            self.state = State.STARTING
-
             try:
-                _logger.info('Registering driver client with server {}.'
-                             .format(self.hostaddr))
                 self._configure_udp_socket()
-                self._register_driver()
-                self.state = State.RUNNING
-                _logger.info('Connection successful.')
+                self.state = State.STARTING
 
             except socket.error as ex:
                 _logger.error('Cannot connect to server: {}'.format(ex))
-                self.state = State.STOPPED
 
-        while self.state is State.RUNNING:
-            self._process_server_msg()
+        while self.state is State.STARTING or self.state is State.RUNNING:
+            if self.state is State.STARTING:
+                # first registration or again after a restart:
+                _logger.info('Registering driver client with server {}.'
+                             .format(self.hostaddr))
+                self._register_driver()
+                self.state = State.RUNNING
+                _logger.info('Connection successful.')
+            else:
+                self._process_server_msg()
 
         _logger.info('Client stopped.')
         self.state = State.STOPPED
 
+        return self.result
+
+    def run_batch(self, drivers):
+        """Evaluates drivers one after another on one server connection.
+
+        Each driver races until the termination policy fires, then the client
+        requests a race restart and drives the restarted race with the next
+        driver. A driver given several times in a row is reset with
+        ``on_restart`` instead of being shut down. All drivers need the range
+        finder angles the client registered with.
+
+        Args:
+            drivers: Iterable of ``Driver``, may be a generator creating each
+                driver only when its race starts.
+
+        Returns:
+            List of ``EvaluationResult``, one per evaluated driver.
+        """
+        drivers = iter(drivers)
+        driver = next(drivers, None)
+        if driver is None:
+            return []
+
+        if self.termination_policy is None:
+            _logger.warning('Without termination policy, only the first '
+                            'driver races before the server shuts down.')
+
+        self._set_driver(driver)
+        self._drivers = drivers
+        self.results = []
+        self._reset_evaluation()
+        try:
+            self.run()
+        finally:
+            self._drivers = None
+        return self.results
+
+    def request_restart(self):
+        """Asks the server to restart the race with the next reply."""
+        self.restart_requested = True
+
     def stop(self):
         """Exits cyclic client execution (asynchronously)."""
 
         if self.state is State.RUNNING:
+            self._finish_evaluation()
 
-            with open(self.fitnessFile, 'w') as fitnessFile:
-                fitnessFile.write(str(self.evaluation['fitness']))
+            if self.fitnessFile:
+                with open(self.fitnessFile, 'w') as fitnessFile:
+                    fitnessFile.write(str(self.evaluation['fitness']))
 
             _logger.info('Disconnecting from racing server.')
             self.state = State.STOPPING
             self.driver.on_shutdown()
 
+            if self.drain:
+                _logger.info('Skipped {} outdated sensor messages, up to {} '
+                             'queued at once.'.format(self.skipped_messages,
+                                                      self.max_backlog))
+
+            if self.profiler and self.profiler.tick.count:
+                _logger.info('Control cycle latency:\n{}'.format(
+                    self.profiler.report()
+                ))
+
     def _configure_udp_socket(self):
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.settimeout(TO_SOCKET_SEC)
@@ -118,17 +227,7 @@ class Client:
         response.
         """
 
-        angles = self.driver.range_finder_angles
-        assert len(angles) == 19, \
-            'Inconsistent length {} of range of finder iterable.'.format(
-                len(angles)
-            )
-
-        data = {'init': angles}
-        buffer = self.serializer.encode(
-            data,
-            prefix='SCR-{}'.format(self.hostaddr[1])
-        )
+        buffer = self.init_message()
 
         _logger.info('Registering client.')
 
@@ -147,61 +246,265 @@ class Client:
             except socket.error as ex:
                 _logger.debug('No connection to server yet ({}).'.format(ex))
 
+    def init_message(self):
+        """Encodes driver's initialization data sent to register with server."""
+        angles = self.driver.range_finder_angles
+        assert len(angles) == 19, \
+            'Inconsistent length {} of range of finder iterable.'.format(
+                len(angles)
+            )
+
+        data = {'init': angles}
+        return self.serializer.encode(
+            data,
+            prefix='SCR-{}'.format(self.hostaddr[1])
+        )
+
     def _process_server_msg(self):
         try:
             buffer, _ = self.socket.recvfrom(TO_SOCKET_MSEC)
             _logger.debug('Received buffer {!r}.'.format(buffer))
 
-            if not buffer:
-                return
+            if self.drain:
+                buffer = self._drain_socket(buffer)
 
-            elif MSG_SHUTDOWN in buffer:
-                _logger.info('Server requested shutdown.')
+            buffer = self.handle_message(buffer)
+            if buffer is not None:
+                _logger.debug('Sending buffer {!r}.'.format(buffer))
+                self.socket.sendto(buffer, self.hostaddr)
+                if self.profiler:
+                    self.profiler.end()
 
-                self.stop()
+        except socket.error as ex:
+            _logger.warning('Communication with server failed: {}.'.format(ex))
 
-            elif MSG_RESTART in buffer:
-                _logger.info('Server requested restart of driver.')
-                self.driver.on_restart()
+        except KeyboardInterrupt:
+            _logger.info('User requested shutdown.')
+            self.stop()
 
-            else:
-                sensor_dict = self.serializer.decode(buffer)
-                carstate = CarState(sensor_dict)
-                _logger.debug(carstate)
+    def _drain_socket(self, buffer):
+        """Reads all queued datagrams, returning the newest sensor message.
+
+        Control messages are handled right away and invalidate any sensor
+        message received before them.
+        """
+        latest = None
+        backlog = 0
+
+        self.socket.setblocking(False)
+        try:
+            while buffer is not None:
+                if MSG_SHUTDOWN in buffer or MSG_RESTART in buffer:
+                    if latest is not None:
+                        self.skipped_messages += 1
+                    latest = None
+                    self.handle_message(buffer)
+                    if self.state is not State.RUNNING:
+                        break
+                elif buffer:
+                    if latest is not None:
+                        self.skipped_messages += 1
+                    latest = buffer
+
+                try:
+                    buffer, _ = self.socket.recvfrom(TO_SOCKET_MSEC)
+                    backlog += 1
+                except BlockingIOError:
+                    buffer = None
+        finally:
+            self.socket.settimeout(TO_SOCKET_SEC)
+
+        self.backlog = backlog
+        if backlog > self.max_backlog:
+            self.max_backlog = backlog
+
+        return latest
+
+    def handle_message(self, buffer):
+        """Processes a message received from the server.
+
+        Independent of the transport, so the same state machine can be driven
+        by the blocking socket loop of ``run`` or by other network code. The
+        caller ends the profiler's tick once the reply was sent. After a
+        restart message the state is ``State.STARTING`` and the caller sends
+        ``init_message`` again until the server identifies the driver.
 
-                self.evaluation['crashed'] = (abs(carstate.distance_from_center) > 0.9)
-                self.evaluation['stuck'] = carstate.speed_x < 5 and carstate.current_lap_time > 10
-                self.evaluation['time'] = carstate.current_lap_time
-                self.evaluation['position'] = carstate.race_position
-                self.evaluation['distance'] = carstate.distance_raced
-                self.evaluation['steering'] += 1
-                self.evaluation['lapComplete'] = carstate.last_lap_time > 0
-                self.evaluation['lapTime'] = carstate.last_lap_time
+        Args:
+            buffer (bytes): Message received from the server.
 
-                self.evaluation['avgSpeed'] = 0 if carstate.current_lap_time <= 0 or carstate.distance_from_start <= 0 else\
-                    min(carstate.distance_raced, carstate.distance_from_start) / carstate.current_lap_time
+        Returns:
+            Bytes of the reply to send to the server or ``None``.
+        """
+        if not buffer:
+            return None
 
-                self.evaluation['fitness'] = self.getFitness()
+        elif MSG_SHUTDOWN in buffer:
+            _logger.info('Server requested shutdown.')
 
-                # if(self.evaluation['crashed'] or self.evaluation['stuck'] or self.evaluation['lapComplete']):
-                #     self.stop()
+            self.stop()
 
-                command = self.driver.drive(carstate)
-                self.evaluation['steering'] = (self.evaluation['steering'] * (self.evaluation['iteration'] - 1) + abs(command.steering)) / self.evaluation['iteration']
+        elif MSG_RESTART in buffer:
+            _logger.info('Server requested restart of driver.')
+            self._restart()
+
+        else:
+            profiler = self.profiler
+            if profiler:
+                profiler.begin()
+
+            if self.restart_requested or self._awaiting_restart:
+                return self._restart_reply()
+
+            sensors = self.serializer.decode_sensors(buffer)
+            if profiler:
+                profiler.lap('decode')
+
+            carstate = self.serializer.create_state(sensors)
+            if profiler:
+                profiler.lap('state')
+            _logger.debug(carstate)
+
+            self.evaluation['crashed'] = (abs(carstate.distance_from_center) > 0.9)
+            self.evaluation['stuck'] = carstate.speed_x < 5 and carstate.current_lap_time > 10
+            self.evaluation['time'] = carstate.current_lap_time
+            self.evaluation['position'] = carstate.race_position
+            self.evaluation['distance'] = carstate.distance_raced
+            self.evaluation['steering'] += 1
+            self.evaluation['lapComplete'] = carstate.last_lap_time > 0
+            self.evaluation['lapTime'] = carstate.last_lap_time
+            self.evaluation['ticks'] += 1
+
+            self.evaluation['avgSpeed'] = 0 if carstate.current_lap_time <= 0 or carstate.distance_from_start <= 0 else\
+                min(carstate.distance_raced, carstate.distance_from_start) / carstate.current_lap_time
+
+            self.evaluation['fitness'] = self.getFitness()
+
+            if self.termination_policy:
+                reason = self.termination_policy.update(carstate)
+                if reason:
+                    return self._terminate(reason)
+
+            if profiler:
+                profiler.lap('evaluate')
+
+            command = self.driver.drive(carstate)
+            if profiler:
+                profiler.lap('drive')
+            self.evaluation['steering'] = (self.evaluation['steering'] * (self.evaluation['iteration'] - 1) + abs(command.steering)) / self.evaluation['iteration']
+
+            # print('speed: {}, time: {}, distance: {}'.format(self.evaluation['avgSpeed'], carstate.current_lap_time, self.evaluation['distance']))
+
+            _logger.debug(command)
+            buffer = self.serializer.encode_command(command)
+            if profiler:
+                profiler.lap('encode')
+            return buffer
+
+        return None
+
+    def _terminate(self, reason):
+        """Ends evaluation early, returning the race restart request."""
+        _logger.info('Ending evaluation early: {}.'.format(reason))
+        self.evaluation['terminated'] = reason
+
+        self.request_restart()
+        buffer = self._restart_reply()
+        if self._drivers is None:
+            self.stop()
 
-                # print('speed: {}, time: {}, distance: {}'.format(self.evaluation['avgSpeed'], carstate.current_lap_time, self.evaluation['distance']))
+        if self.profiler:
+            self.profiler.lap('evaluate')
+        return buffer
 
-                _logger.debug(command)
-                buffer = self.serializer.encode(command.actuator_dict)
-                _logger.debug('Sending buffer {!r}.'.format(buffer))
-                self.socket.sendto(buffer, self.hostaddr)
+    def _restart_reply(self):
+        """Command holding the car until the race restarts.
 
-        except socket.error as ex:
-            _logger.warning('Communication with server failed: {}.'.format(ex))
+        The restart itself is requested only once, the server answers it with
+        a restart message.
+        """
+        command = Command()
+        command.brake = 1
+        if self.restart_requested:
+            command.meta = 1
+            self.restart_requested = False
+            self._awaiting_restart = True
+        return self.serializer.encode_command(command)
+
+    def _restart(self):
+        """Ends the current race's evaluation, readying the next one."""
+        self.restart_requested = self._awaiting_restart = False
+        self._finish_evaluation()
+
+        if self._drivers is None:
+            self._reset_evaluation()
+            self.driver.on_restart()
+        else:
+            driver = next(self._drivers, None)
+            if driver is None:
+                _logger.info('All drivers of batch evaluated.')
+                self.stop()
+                return
 
-        except KeyboardInterrupt:
-            _logger.info('User requested shutdown.')
-            self.stop()
+            self._reset_evaluation()
+            if driver is self._driver:
+                self.driver.on_restart()
+            else:
+                self.driver.on_shutdown()
+                self._set_driver(driver)
+
+        # server waits for the driver to register again:
+        self.state = State.STARTING
+
+    def _set_driver(self, driver):
+        self._driver = driver
+        self.driver = driver
+        if self.deadline is not None:
+            self.driver = DeadlineDriver(driver, self.deadline, self.fallback)
+
+    def _reset_evaluation(self):
+        self.evaluation = {
+            'crashed': False,
+            'stuck': False,
+            'fitness': 0,
+            'time': 0,
+            'avgSpeed': 0,
+            'position': 0,
+            'steering': 0,
+            'iteration': 1,
+            'lapComplete': False,
+            'distance': 0,
+            'lapTime': 0,
+            'ticks': 0,
+            'terminated': None
+        }
+        self._recorded = False
+        if self.termination_policy:
+            self.termination_policy.reset()
+
+    def _finish_evaluation(self):
+        """Records result of the current race once, if driven at all.
+
+        In batch mode the race of every driver is recorded, so results match
+        the drivers by position.
+        """
+        if not self._recorded and (self.evaluation['ticks'] or
+                                   self._drivers is not None):
+            self.results.append(self.result)
+            self._recorded = True
+
+    @property
+    def result(self):
+        """Current ``EvaluationResult`` of the race."""
+        return EvaluationResult(
+            fitness=self.evaluation['fitness'],
+            lap_time=self.evaluation['lapTime'],
+            distance=self.evaluation['distance'],
+            crashed=self.evaluation['crashed'],
+            stuck=self.evaluation['stuck'],
+            lap_complete=self.evaluation['lapComplete'],
+            ticks=self.evaluation['ticks'],
+            terminated=self.evaluation['terminated']
+        )
 
     def getFitness(self) -> float:
 
@@ -254,6 +557,34 @@ class Serializer:
 
         return ''.join(elements).encode()
 
+    def encode_command(self, command):
+        """Encodes driving command.
+
+        Same result as encoding ``command.actuator_dict``, but formats the
+        fixed actuator layout with a precompiled template instead of building
+        and joining intermediate dictionaries, lists and strings.
+
+        Args:
+            command (Command): Command to send to the server.
+
+        Returns:
+            Bytes to be sent over the wire.
+        """
+        values = (
+            command.accelerator,
+            command.brake,
+            command.gear,
+            command.steering,
+            command.focus,
+            command.meta,
+        )
+
+        if None in values:
+            # unset actuators are omitted from message:
+            return self.encode(command.actuator_dict)
+
+        return (COMMAND_TEMPLATE % values).encode()
+
     @staticmethod
     def decode(buff):
         """
@@ -295,6 +626,123 @@ class Serializer:
 
         return d
 
+    def decode_sensors(self, buff):
+        """Decodes sensor data in the form ``create_state`` expects."""
+        return self.decode(buff)
+
+    def create_state(self, sensors):
+        """Creates car state from decoded sensor data."""
+        return CarState(sensors)
+
+    def decode_state(self, buff):
+        """Decodes car state from message received from racing server."""
+        return self.create_state(self.decode_sensors(buff))
+
     @staticmethod
     def rolling_average(average, iterations, newValue):
-        return ((average * iterations) + newValue) / (iterations + 1)
\ No newline at end of file
+        return ((average * iterations) + newValue) / (iterations + 1)
+
+
+class BufferSerializer(Serializer):
+    """Serializer decoding sensor data into a preallocated value buffer.
+
+    The values of all keys in the layout are written to fixed offsets of one
+    flat float array, allocated once per serializer. Messages holding exactly
+    the keys of the layout in layout order are tokenized on the raw bytes and
+    converted in a single bulk assignment. Any other message falls back to
+    ``Serializer.decode`` and is transferred key by key: values of unknown
+    keys are kept in string form in ``extra``, missing or malformed values are
+    set to NaN.
+
+    Attributes:
+        layout (tuple): Pairs of sensor key and number of values.
+        slices (dict): Slice of ``values`` for each sensor key of the layout.
+        values (np.ndarray): Buffer of ``np.float64`` holding the sensor values
+            of the last decoded message. Overwritten by the next message.
+        extra (dict): Key value pairs of the last decoded message that are not
+            part of the layout.
+    """
+
+    def __init__(self, layout=SENSOR_LAYOUT):
+        self.layout = tuple(layout)
+        self.slices = {}
+
+        key_indices = []
+        value_indices = []
+        offset = 0
+        for key, count in self.layout:
+            self.slices[key] = slice(offset, offset + count)
+            token = offset + len(key_indices)
+            key_indices.append(token)
+            value_indices.extend(range(token + 1, token + 1 + count))
+            offset += count
+
+        self.values = np.full(offset, np.nan)
+        self.extra = {}
+
+        self._numtokens = len(key_indices) + len(value_indices)
+        self._keys = tuple(key.encode() for key, _ in self.layout)
+        self._get_keys = _tuple_getter(key_indices)
+        self._get_values = _tuple_getter(value_indices)
+
+    def decode_values(self, buff):
+        """Decodes sensor data received from racing server into ``values``.
+
+        Args:
+            buff (bytes): Message as received from server.
+
+        Returns:
+            The ``values`` buffer, valid until the next call.
+        """
+        tokens = buff[buff.find(b'(') + 1:buff.rfind(b')')] \
+            .replace(b')(', b' ').split()
+
+        if len(tokens) == self._numtokens and \
+                self._get_keys(tokens) == self._keys:
+            try:
+                self.values[:] = self._get_values(tokens)
+                if self.extra:
+                    self.extra = {}
+                return self.values
+            except ValueError:
+                pass
+
+        self._decode_items(buff)
+        return self.values
+
+    def decode_sensors(self, buff):
+        return self.decode_values(buff)
+
+    def create_state(self, sensors):
+        """Creates array backed car state owning a copy of the values."""
+        return ArrayCarState(sensors.copy(), self.extra)
+
+    def _decode_items(self, buff):
+        self.values.fill(np.nan)
+        self.extra = {}
+
+        for key, value in self.decode(buff).items():
+            s = self.slices.get(key)
+            if s is None:
+                self.extra[key] = value
+                continue
+
+            if not isinstance(value, list):
+                value = [value]
+
+            try:
+                if len(value) != s.stop - s.start:
+                    raise ValueError('unexpected number of values')
+                self.values[s] = [float(v) for v in value]
+            except ValueError as ex:
+                _logger.warning(
+                    'Sensor value {!r} not matching layout: {}.'.format(key, ex)
+                )
+
+
+def _tuple_getter(indices):
+    """Returns callable picking a tuple of items at given indices."""
+    if len(indices) == 1:
+        index, = indices
+        return lambda sequence: (sequence[index],)
+    return itemgetter(*indices)
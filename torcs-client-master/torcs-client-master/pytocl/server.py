@@ -0,0 +1,275 @@
+"""Local stand-in for the SCRC racing server replaying recorded messages.
+
+Speaks the client side handshake of the SCRC network server, so clients can
+be exercised, benchmarked and tested without TORCS:
+
+    python -m pytocl.server recorded-packets.txt --rate 0
+"""
+import argparse
+import logging
+import socket
+import time
+
+from pytocl.protocol import MSG_IDENTIFIED, MSG_RESTART, MSG_SHUTDOWN
+
+_logger = logging.getLogger(__name__)
+
+# SCRC server waits this long for the driver's reply to each message, in s:
+REPLY_TIMEOUT_SEC = 0.01
+
+
+def load_packets(filepath):
+    """Reads recorded sensor messages, one message per line."""
+    with open(filepath, 'rb') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+class ReplayReport:
+    """Outcome of replaying sensor messages to a client.
+
+    Attributes:
+        sent: Number of sensor messages sent.
+        latencies: Reply latency of every answered message, s.
+        dropped: Number of messages without reply within timeout.
+        late: Number of replies arriving after their timeout.
+        duration: Wall time from first to last message, s.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.latencies = []
+        self.dropped = 0
+        self.late = 0
+        self.duration = 0.0
+
+    @property
+    def answered(self):
+        return len(self.latencies)
+
+    @property
+    def drop_rate(self):
+        return self.dropped / self.sent if self.sent else 0.0
+
+    def percentile(self, p):
+        """Reply latency percentile, ``p`` in [0;100], s."""
+        if not self.latencies:
+            return float('nan')
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(p / 100 * len(ordered)))
+        return ordered[index]
+
+    def __str__(self):
+        return '\n'.join((
+            'sent: {}, answered: {}, dropped: {} ({:.2%}), late: {}'.format(
+                self.sent, self.answered, self.dropped, self.drop_rate,
+                self.late
+            ),
+            'latency p50: {:.3f} ms, p99: {:.3f} ms, max: {:.3f} ms'.format(
+                self.percentile(50) * 1000,
+                self.percentile(99) * 1000,
+                max(self.latencies, default=float('nan')) * 1000
+            ),
+            'duration: {:.3f} s, {:.1f} messages/s'.format(
+                self.duration,
+                self.sent / self.duration if self.duration else 0.0
+            ),
+        ))
+
+
+class ReplayServer:
+    """UDP server replaying recorded sensor messages to one client.
+
+    Waits for the client's ``SCR`` init message and identifies it, then sends
+    every recorded message and waits up to ``timeout`` for the reply. Replies
+    are not numbered, so replies still pending when the next message is due
+    are discarded and counted as late. Finally the client is shut down.
+
+    Like the SCRC server, a restart request drops the client's registration:
+    no further message is sent until the client registered again.
+
+    Attributes:
+        packets (list): Sensor messages to replay.
+        rate (float): Messages per second, 50 like the SCRC server. ``0`` or
+            ``None`` sends the next message as soon as the last one was
+            answered or timed out.
+        timeout (float): Time to wait for the reply to each message, s.
+        repeat (int): Number of times to replay all messages.
+        restart_every (int): Send a restart request after this many messages
+            and wait for the client to register again, ``None`` for never.
+        socket (socket): UDP socket the server is bound to.
+    """
+
+    def __init__(self, packets, hostname='localhost', port=3001, *,
+                 rate=50, timeout=REPLY_TIMEOUT_SEC, repeat=1,
+                 restart_every=None):
+        self.packets = list(packets)
+        self.rate = rate
+        self.timeout = timeout
+        self.repeat = repeat
+        self.restart_every = restart_every
+        self.client_addr = None
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((hostname, port))
+
+    @property
+    def address(self):
+        """Host name and port the server is bound to."""
+        return self.socket.getsockname()
+
+    def close(self):
+        self.socket.close()
+
+    def serve(self, connect_timeout=None):
+        """Waits for a client and replays all messages to it.
+
+        Args:
+            connect_timeout (float): Time to wait for the client to register,
+                ``None`` to wait forever.
+
+        Returns:
+            ``ReplayReport`` of the session.
+        """
+        self._accept(connect_timeout)
+
+        report = ReplayReport()
+        period = 1 / self.rate if self.rate else 0
+        start = time.perf_counter()
+
+        for i in range(self.repeat * len(self.packets)):
+            if period:
+                delay = start + i * period - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            if self.restart_every and i and i % self.restart_every == 0:
+                report.late += self._discard_pending()
+                _logger.info('Requesting restart of driver.')
+                self.socket.sendto(MSG_RESTART, self.client_addr)
+                self._accept(connect_timeout)
+
+            report.late += self._discard_pending()
+            packet = self.packets[i % len(self.packets)]
+            sent = time.perf_counter()
+            self.socket.sendto(packet, self.client_addr)
+            report.sent += 1
+
+            if self._wait_reply(sent + self.timeout):
+                report.latencies.append(time.perf_counter() - sent)
+            else:
+                report.dropped += 1
+
+        report.duration = time.perf_counter() - start
+        report.late += self._discard_pending()
+
+        _logger.info('Requesting shutdown of driver.')
+        self.socket.sendto(MSG_SHUTDOWN, self.client_addr)
+        return report
+
+    def _accept(self, connect_timeout):
+        self.socket.settimeout(connect_timeout)
+        while True:
+            buffer, addr = self.socket.recvfrom(4096)
+            if buffer.startswith(b'SCR'):
+                _logger.info('Identified client {}.'.format(addr))
+                self.client_addr = addr
+                self.socket.sendto(MSG_IDENTIFIED, addr)
+                return
+
+    def _wait_reply(self, deadline):
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            self.socket.settimeout(remaining)
+            try:
+                buffer, addr = self.socket.recvfrom(4096)
+            except socket.timeout:
+                return False
+            if addr == self.client_addr and not buffer.startswith(b'SCR'):
+                return True
+
+    def _discard_pending(self):
+        """Drops replies that arrived after their timeout."""
+        self.socket.setblocking(False)
+        count = 0
+        try:
+            while True:
+                buffer, addr = self.socket.recvfrom(4096)
+                if addr == self.client_addr and not buffer.startswith(b'SCR'):
+                    count += 1
+        except BlockingIOError:
+            return count
+
+
+def main():
+    """Replays a recording to a client connecting from the command line."""
+    parser = argparse.ArgumentParser(
+        description='Replays recorded sensor messages like a SCRC server.'
+    )
+    parser.add_argument(
+        'packets',
+        help='File with one recorded sensor message per line.'
+    )
+    parser.add_argument(
+        '--hostname',
+        help='Host name to bind.',
+        default='localhost'
+    )
+    parser.add_argument(
+        '-p',
+        '--port',
+        help='Port to bind, 3001 - 3010 for clients 1 - 10.',
+        type=int,
+        default=3001
+    )
+    parser.add_argument(
+        '--rate',
+        help='Messages per second, 0 to send as fast as the client answers.',
+        type=float,
+        default=50
+    )
+    parser.add_argument(
+        '--timeout',
+        help='Time to wait for each reply in seconds.',
+        type=float,
+        default=REPLY_TIMEOUT_SEC
+    )
+    parser.add_argument(
+        '--repeat',
+        help='Number of times to replay the recording.',
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        '--restart-every',
+        help='Request driver restart after this many messages, the driver '
+             'registers again.',
+        type=int,
+        default=None
+    )
+    parser.add_argument('-v', help='Debug log level.', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.v else logging.INFO,
+        format="%(asctime)s %(levelname)7s %(name)s %(message)s"
+    )
+
+    server = ReplayServer(
+        load_packets(args.packets),
+        args.hostname,
+        args.port,
+        rate=args.rate,
+        timeout=args.timeout,
+        repeat=args.repeat,
+        restart_every=args.restart_every
+    )
+    try:
+        print(server.serve())
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
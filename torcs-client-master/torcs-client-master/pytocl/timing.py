@@ -0,0 +1,124 @@
+"""Low overhead timing of the client's control cycle."""
+import time
+
+# the driver has to answer within this time, in ns:
+DEADLINE_NS = 10 * 1000 * 1000
+
+# stages of processing one sensor message, in order:
+STAGES = ('decode', 'state', 'evaluate', 'drive', 'encode', 'send')
+
+
+class Histogram:
+    """Histogram of durations with fixed bucket width.
+
+    Recording a value is an integer division and a list increment. Values
+    beyond the last bucket are counted in an overflow bucket, the exact
+    maximum is kept separately.
+
+    Attributes:
+        bucket_ns: Width of each bucket, ns.
+        counts: Number of values per bucket, last entry counts overflows.
+        count: Number of recorded values.
+        total: Sum of recorded values, ns.
+        max: Largest recorded value, ns.
+    """
+
+    def __init__(self, bucket_ns=5000, num_buckets=4000):
+        self.bucket_ns = bucket_ns
+        self.counts = [0] * (num_buckets + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        """Records a duration in ns."""
+        index = value // self.bucket_ns
+        if index >= len(self.counts):
+            index = len(self.counts) - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def count_above(self, limit):
+        """Number of recorded values in buckets starting at or above limit."""
+        first = -(-limit // self.bucket_ns)
+        return sum(self.counts[first:])
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, p):
+        """Upper bound of bucket holding the ``p``-th percentile, ns."""
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index == len(self.counts) - 1:
+                    return self.max
+                return min((index + 1) * self.bucket_ns, self.max)
+        return self.max
+
+
+class TickProfiler:
+    """Timing of each stage of the control cycle against its deadline.
+
+    The client calls ``begin`` when a sensor message arrived, ``lap`` after
+    each stage and ``end`` once the reply was sent.
+
+    Attributes:
+        deadline_ns: Time budget per control cycle, ns.
+        stages: ``Histogram`` per stage name in ``STAGES``.
+        tick: ``Histogram`` of complete control cycles.
+        misses: Number of control cycles exceeding the deadline.
+    """
+
+    def __init__(self, deadline_ns=DEADLINE_NS, **histogram_args):
+        self.deadline_ns = deadline_ns
+        self.stages = {s: Histogram(**histogram_args) for s in STAGES}
+        self.tick = Histogram(**histogram_args)
+        self.misses = 0
+        self._start = 0
+        self._last = 0
+
+    def begin(self):
+        self._start = self._last = time.perf_counter_ns()
+
+    def lap(self, stage):
+        now = time.perf_counter_ns()
+        self.stages[stage].add(now - self._last)
+        self._last = now
+
+    def end(self):
+        self.lap('send')
+        duration = self._last - self._start
+        self.tick.add(duration)
+        if duration > self.deadline_ns:
+            self.misses += 1
+
+    def report(self):
+        """Table of latency percentiles per stage and deadline misses."""
+        lines = ['{:<10} {:>10} {:>10} {:>10} {:>10}'.format(
+            'stage', 'mean [ms]', 'p50 [ms]', 'p99 [ms]', 'max [ms]'
+        )]
+        for name, histogram in list(self.stages.items()) + [('tick', self.tick)]:
+            lines.append('{:<10} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}'.format(
+                name,
+                histogram.mean / 1e6,
+                histogram.percentile(50) / 1e6,
+                histogram.percentile(99) / 1e6,
+                histogram.max / 1e6
+            ))
+        lines.append('{} of {} ticks exceeded the {:.1f} ms deadline, drive() '
+                     'alone {} times.'.format(
+                         self.misses,
+                         self.tick.count,
+                         self.deadline_ns / 1e6,
+                         self.stages['drive'].count_above(self.deadline_ns + 1)
+                     ))
+        return '\n'.join(lines)
@@ -0,0 +1,93 @@
+"""Deadline supervision of driving logic."""
+import concurrent.futures
+import logging
+
+from pytocl.car import State, Command
+from pytocl.driver import Driver
+
+_logger = logging.getLogger(__name__)
+
+
+class DeadlineDriver(Driver):
+    """Runs a driver under a deadline, falling back to a cheap command.
+
+    The wrapped driver's ``drive`` is executed in a worker thread. If it does
+    not return within the deadline, or is still busy with an earlier state, a
+    fallback command is returned instead, so the server gets an answer in
+    every control cycle. Results arriving too late are discarded.
+
+    Note that the watchdog cannot interrupt pauses of the whole interpreter,
+    like garbage collection, it only bounds the time spent waiting for the
+    driver.
+
+    Attributes:
+        driver (Driver): Supervised driver.
+        deadline (float): Time to wait for the supervised driver, s.
+        fallback (str): ``'last'`` to repeat the last command of the driver or
+            ``'pid'`` for the PID control of the base ``Driver``. Without a
+            last command yet, PID control is used as well.
+        ticks: Number of commands requested.
+        fallbacks: Number of fallback commands returned.
+    """
+
+    def __init__(self, driver, deadline, fallback='last'):
+        if fallback not in ('last', 'pid'):
+            raise ValueError('Unknown fallback {!r}.'.format(fallback))
+
+        super().__init__(logdata=False)
+        self.driver = driver
+        self.deadline = deadline
+        self.fallback = fallback
+        self.ticks = 0
+        self.fallbacks = 0
+        self.last_command = None
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix='drive'
+        )
+        self._pending = None
+
+    @property
+    def range_finder_angles(self):
+        return self.driver.range_finder_angles
+
+    def on_restart(self):
+        self._wait_pending()
+        self.last_command = None
+        self.driver.on_restart()
+
+    def on_shutdown(self):
+        self._wait_pending()
+        self._executor.shutdown()
+        _logger.info('Fallback command sent in {} of {} control cycles.'
+                     .format(self.fallbacks, self.ticks))
+        self.driver.on_shutdown()
+
+    def drive(self, carstate: State) -> Command:
+        self.ticks += 1
+
+        if self._pending is not None and not self._pending.done():
+            _logger.debug('Driver still busy with earlier state.')
+            return self._fallback_command(carstate)
+
+        self._pending = self._executor.submit(self.driver.drive, carstate)
+        try:
+            command = self._pending.result(timeout=self.deadline)
+        except concurrent.futures.TimeoutError:
+            _logger.debug('Driver missed deadline.')
+            return self._fallback_command(carstate)
+
+        self.last_command = command
+        return command
+
+    def _fallback_command(self, carstate):
+        self.fallbacks += 1
+        if self.fallback == 'last' and self.last_command is not None:
+            return self.last_command
+        return super().drive(carstate)
+
+    def _wait_pending(self):
+        if self._pending is not None:
+            concurrent.futures.wait((self._pending,))
+            self._pending = None
@@ -0,0 +1,135 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class Roadmap:
+    """Absolute steering per track segment, recorded while driving.
+
+    Values are kept in a preallocated numpy array indexed by segment, growing
+    by doubling when full. For each configured lookahead distance a second
+    array holds the maximum over the segments from each position up to that
+    distance ahead (cut off at the end of the roadmap). It is updated on
+    append, which touches only the positions whose window reaches the new
+    segment, so ``maxAhead`` is a single lookup. A background thread writes
+    the roadmap to disk every ``flushInterval`` seconds if it changed, and
+    ``close`` writes it a last time. Files hold a pickled list of floats like the roadmap files
+    written before, so both can be loaded.
+    """
+
+    def __init__(
+        self,
+        path: str = 'roadmap',
+        flushInterval: float = 5.0,
+        capacity: int = 1024,
+        segmentLength: int = 10,
+        lookaheads: tuple = (200,)
+    ):
+        self.path = path
+        self.flushInterval = flushInterval
+        self.segmentLength = segmentLength
+
+        self.values = np.zeros(capacity)
+        self.length = 0
+
+        # maximum over window of segments per lookahead distance in metres:
+        self.windows = {lookahead: max(1, lookahead // segmentLength) for lookahead in lookaheads}
+        self.maxima = {lookahead: np.zeros(capacity) for lookahead in lookaheads}
+
+        self.lock = threading.Lock()
+        # an empty roadmap replaces any previous file as well:
+        self.dirty = True
+        self.stopped = threading.Event()
+        self.flusher = None
+
+        if path is not None and flushInterval:
+            self.flusher = threading.Thread(target=self.flushPeriodically, name='roadmap', daemon=True)
+            self.flusher.start()
+
+    @staticmethod
+    def load(path: str = 'roadmap', flushInterval: float = 5.0, **kwargs) -> 'Roadmap':
+
+        with open(path, 'rb') as file:
+            segments = pickle.load(file)
+
+        roadmap = Roadmap(path, flushInterval, max(1024, 2 * len(segments)), **kwargs)
+        roadmap.values[:len(segments)] = segments
+        roadmap.length = len(segments)
+        roadmap.dirty = False
+
+        for lookahead, window in roadmap.windows.items():
+            if segments:
+                padded = np.concatenate((segments, np.full(window - 1, -np.inf)))
+                roadmap.maxima[lookahead][:len(segments)] = sliding_window_view(padded, window).max(axis=1)
+
+        return roadmap
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, item):
+        return self.values[:self.length][item]
+
+    def append(self, value: float):
+
+        with self.lock:
+            if self.length == len(self.values):
+                self.values = np.concatenate((self.values, np.zeros(len(self.values))))
+                for lookahead, maxima in self.maxima.items():
+                    self.maxima[lookahead] = np.concatenate((maxima, np.zeros(len(maxima))))
+
+            position = self.length
+            self.values[position] = value
+
+            for lookahead, window in self.windows.items():
+                maxima = self.maxima[lookahead]
+                maxima[position] = value
+                first = max(0, position - window + 1)
+                np.maximum(maxima[first:position], value, out=maxima[first:position])
+
+            self.length += 1
+            self.dirty = True
+
+    def clear(self):
+        """Drops all segments, so the next race records the track from scratch."""
+
+        with self.lock:
+            # positions below the length are overwritten on append, maxima included:
+            self.length = 0
+            self.dirty = True
+
+    def maxAhead(self, position: int, lookahead: int = 200) -> float:
+        """Maximum value from segment at position up to lookahead metres ahead."""
+        return self.maxima[lookahead][position] if position < self.length else float('nan')
+
+    def flush(self):
+
+        with self.lock:
+            if not self.dirty:
+                return
+            segments = self.values[:self.length].tolist()
+            self.dirty = False
+
+        # replace file at once, readers never see a partially written roadmap:
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump(segments, file)
+        os.replace(temporary, self.path)
+
+    def flushPeriodically(self):
+
+        while not self.stopped.wait(self.flushInterval):
+            self.flush()
+
+    def close(self):
+
+        self.stopped.set()
+        if self.flusher is not None:
+            self.flusher.join()
+            self.flusher = None
+
+        if self.path is not None:
+            self.flush()
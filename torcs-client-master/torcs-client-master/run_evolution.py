@@ -1,15 +1,25 @@
 #! /usr/bin/env python3
+import argparse
+import functools
+import os
+import signal
 import subprocess
 import pickle
 import neat
-import sys
-sys.path.insert(1, 'myneat')
 
 
 from neat.checkpoint import Checkpointer
-from FileReporter import FileReporter
+from myneat.FileReporter import FileReporter
+from myneat.SlotEvaluator import SlotEvaluator, Slot, getSlots
+from myneat.CompiledNetwork import CompiledNetwork
+from myneat.PreScreening import PreScreener, loadTelemetry
+from myneat.FitnessCache import FitnessCache
+from myneat.SuccessiveHalving import SuccessiveHalving, Rung
+from myneat.EvaluationJournal import EvaluationJournal
+from myneat.CheckpointStore import CheckpointStore
 from pytocl.driver import Driver
-from pytocl.main import main
+from pytocl.evaluation import TerminationPolicy
+from pytocl.protocol import Client
 from my_driver import MyDriver
 
 # if __name__ == '__main__':
@@ -19,36 +29,223 @@ config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
                          neat.DefaultSpeciesSet, neat.DefaultStagnation,
                          'myneat/config')
 
-def eval_genome(genome, config):
+# command starting one race per evaluation, formatted with the slot, e.g.
+# 'torcs -r myneat/race-{slot.index}.xml' for text mode races using scr_server
+# {slot.index}; None to start and stop the race in the GUI with xte keystrokes:
+serverCommand = None
 
-    net = neat.nn.FeedForwardNetwork.create(genome, config)
+# also write each evaluation's fitness to the slot's fitness file:
+fitnessExport = False
 
-    subprocess.call('myneat/autostart.sh', shell=True)
+# ends hopeless evaluations early, restarting the race via the meta actuator:
+terminationPolicy = dict(
+    max_off_track_time=2.0,
+    max_stuck_time=3.0,
+    max_damage=1000,
+    min_progress=20,
+    progress_window=10,
+    stop_on_lap=True
+)
 
-    main(MyDriver(net))
+def startRace(slot):
+    """Starts a race for the slot, returning the server process if there is one."""
 
-    with open('myneat/fitnessFile', 'r') as fitnessFile:
-        fitness = float(fitnessFile.read())
+    if slot.serverCommand is None:
+        subprocess.call('myneat/autostart.sh', shell=True)
+        return None
 
-    subprocess.call('myneat/autostop.sh', shell=True)
-    print('fitness: {}'.format(fitness))
-    return fitness
+    return subprocess.Popen(slot.serverCommand.format(slot=slot), shell=True, start_new_session=True)
 
-def eval_genomes(genomes, config):
+def stopRace(server, restarted: bool):
+    """Ends the race started by `startRace`, `restarted` if the client requested a restart last."""
 
-    for genomeID, genome in genomes:
-        genome.fitness = eval_genome(genome, config)
+    if server is None:
+        subprocess.call('myneat/autostop.sh', shell=True)
+    else:
+        if restarted and server.poll() is None:
+            # the restarted race would go on without a driver:
+            os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
 
-def run():
+def createTerminationPolicy(budget: dict = None):
+    """Termination policy, with thresholds of `budget` like `{'max_distance': 300}` replacing the default ones."""
 
-    #population = Checkpointer().restore_checkpoint('neat-checkpoint-222')
-    population = neat.Population(config)
+    if not terminationPolicy and not budget:
+        return None
+    return TerminationPolicy(**dict(terminationPolicy or {}, **(budget or {})))
+
+def serialSlot() -> Slot:
+    """Slot of evaluations in this process, on the default port."""
+    return Slot(0, 3001, 'myneat/fitnessFile', 'roadmap', serverCommand)
+
+def eval_genome(genome, config, slot: Slot = None, budget: dict = None):
+
+    slot = slot or serialSlot()
+    net = CompiledNetwork.create(genome, config)
+
+    server = startRace(slot)
+
+    driver = MyDriver(net, roadmapFile=slot.roadmapFile)
+    result = Client(
+        port=slot.port,
+        driver=driver,
+        fitnessFile=slot.fitnessFile if fitnessExport else None,
+        termination_policy=createTerminationPolicy(budget)
+    ).run()
+
+    stopRace(server, result.terminated is not None)
+
+    if result.terminated:
+        print('terminated early: {}'.format(result.terminated))
+
+    print('fitness: {}'.format(result.fitness))
+    return result
+
+def eval_batch(genomes, config, slot: Slot = None, budget: dict = None, onResult=None) -> list:
+    """
+    Evaluates genomes one after another in a single race session: the client restarts the race via
+    the meta actuator between genomes and registers again, the same driver swapping networks.
+    `onResult(index, result)` is called as soon as the race of the genome at index ended.
+    The driver's roadmap is cleared on each restart, so every genome starts from an empty one
+    like in `eval_genome`. With `fitnessExport`, each fitness is written to the slot's file.
+    """
+
+    slot = slot or serialSlot()
+    genomes = list(genomes)
+    nets = (CompiledNetwork.create(genome, config) for _, genome in genomes)
+    driver = MyDriver(next(nets), roadmapFile=slot.roadmapFile)
+    client = Client(port=slot.port, driver=driver, termination_policy=createTerminationPolicy(budget))
+
+    def finished(index):
+        if fitnessExport:
+            with open(slot.fitnessFile, 'w') as fitnessFile:
+                fitnessFile.write(str(client.results[index].fitness))
+        if onResult is not None:
+            onResult(index, client.results[index])
+
+    def drivers():
+        yield driver
+        for index, net in enumerate(nets):
+            # the client asks for the next driver once it recorded the race of this one, one result per driver:
+            finished(index)
+            driver.net = net
+            yield driver
+
+    server = startRace(slot)
+    results = client.run_batch(drivers())
+    stopRace(server, True)
+
+    if len(results) == len(genomes):
+        finished(len(results) - 1)
+
+    if len(results) < len(genomes):
+        raise RuntimeError('Race session ended after {} of {} evaluations.'.format(len(results), len(genomes)))
+
+    for result in results:
+        if result.terminated:
+            print('terminated early: {}'.format(result.terminated))
+        print('fitness: {}'.format(result.fitness))
+
+    return results
+
+def eval_genomes(genomes, config, budget: dict = None, onResult=None):
+    """Sets each genome's fitness, calling `onResult(genomeID, genome)` as soon as it is known."""
+
+    genomes = list(genomes)
+
+    def finished(index, result):
+        genomeID, genome = genomes[index]
+        genome.fitness = result.fitness
+        if onResult is not None:
+            onResult(genomeID, genome)
+
+    if terminationPolicy or budget:
+        # evaluations end by restarting the race, so one session serves all genomes:
+        eval_batch(genomes, config, budget=budget, onResult=finished)
+        return
+
+    for index, (genomeID, genome) in enumerate(genomes):
+        finished(index, eval_genome(genome, config))
+
+def run(ports=(3001,), telemetry: str = None, keepFraction: float = 0.5, cacheName: str = 'fitness-cache', samples: int = 1,
+        rungDistances: tuple = (), promoteFraction: float = 0.5, checkpoint: str = None,
+        journalPath: str = 'evaluation-journal.jsonl', checkpointPath: str = 'checkpoints'):
+
+    if checkpoint is not None and os.path.isdir(checkpoint):
+        population = CheckpointStore.restore(checkpoint)
+    elif checkpoint is not None:
+        population = Checkpointer.restore_checkpoint(checkpoint)
+        # checkpoints hold the next generation's population under the number of the saved one:
+        population.generation += 1
+    else:
+        population = neat.Population(config)
     population.add_reporter(neat.StdOutReporter(True))
     population.add_reporter(FileReporter(True))
     population.add_reporter(neat.StatisticsReporter())
-    population.add_reporter(Checkpointer(generation_interval=1))
+    store = CheckpointStore(checkpointPath)
+    population.add_reporter(store)
+
+    # races finished before a crash are not run again when resuming from the last checkpoint:
+    journal = None
+    if journalPath:
+        journal = EvaluationJournal(journalPath)
+        population.add_reporter(journal)
+
+    evaluator = None
+    if len(ports) > 1:
+        if serverCommand is None:
+            raise ValueError('Parallel evaluation needs a server command, the GUI runs one race only.')
+
+        evaluator = SlotEvaluator(eval_genome, getSlots(ports, serverCommand))
+
+    # fitness cache of each rung:
+    caches = []
 
-    winner = population.run(eval_genomes, 400)
+    def liveEvaluation(index: int, budget: dict = None):
+
+        if evaluator is not None:
+            evaluate = functools.partial(evaluator.evaluate_genomes, evaluate=functools.partial(eval_genome, budget=budget))
+        else:
+            evaluate = functools.partial(eval_genomes, budget=budget)
+
+        if journal is not None:
+            evaluate = journal.wrap(evaluate, str(index))
+
+        if cacheName:
+            # unchanged genomes, like elites, are not raced again, fitness differs per budget.
+            # The cache belongs to this run, it is kept with its checkpoints and only read when resuming:
+            path = os.path.join(checkpointPath, cacheName if index == 0 else '{}-{}'.format(cacheName, index))
+            caches.append(FitnessCache(evaluate, samples, path, population.reporters, resume=checkpoint is not None))
+            evaluate = caches[-1].evaluate_genomes
+
+        return evaluate
+
+    if rungDistances:
+        # short races for all genomes, full ones for the best:
+        budgets = [{'max_distance': distance} for distance in rungDistances] + [None]
+        rungs = [Rung(liveEvaluation(index, budget), promoteFraction) for index, budget in enumerate(budgets)]
+        halving = SuccessiveHalving(rungs, population.reporters)
+        # best genomes are those of the best full race:
+        store.raceFitness = halving.raceFitness
+        evaluate = halving.evaluate_genomes
+    else:
+        halving = None
+        evaluate = liveEvaluation(0)
+
+    if telemetry is not None:
+        # only genomes steering plausibly on recorded data race live, genomes with cached fitness are not screened:
+        inputs, steering = loadTelemetry(telemetry)
+        bypass = caches[0].isCached if caches else None
+        evaluate = PreScreener(evaluate, inputs, steering, keepFraction, bypass=bypass).evaluate_genomes
+
+    winner = population.run(evaluate, 400)
+    if halving is not None:
+        winner = halving.bestGenome
+
+    if evaluator is not None:
+        evaluator.close()
+    if journal is not None:
+        journal.close()
 
     # winner_net = neat.nn.FeedForwardNetwork.create(winner, config)
     with open('winner-neat-full', 'wb') as file:
@@ -57,5 +254,73 @@ def run():
     print(winner)
 
 if __name__ == '__main__':
-    run()
 
+    parser = argparse.ArgumentParser(description='Evolves NEAT drivers.')
+    parser.add_argument(
+        '--ports',
+        help='Server ports to evaluate genomes on in parallel, one race per port.',
+        type=int,
+        nargs='+',
+        default=[3001]
+    )
+    parser.add_argument(
+        '--server-command',
+        help='Command starting a race for a slot, e.g. "torcs -r myneat/race-{slot.index}.xml".',
+        default=None
+    )
+    parser.add_argument(
+        '--prescreen',
+        help='Drive log (.pickle) or training database to screen genomes on before racing them.',
+        default=None
+    )
+    parser.add_argument(
+        '--prescreen-keep',
+        help='Share of genomes passing the pre-screening.',
+        type=float,
+        default=0.5
+    )
+    parser.add_argument(
+        '--fitness-cache',
+        help='File in the checkpoint directory caching the fitness per genome structure, read when resuming, empty to disable.',
+        default='fitness-cache'
+    )
+    parser.add_argument(
+        '--samples',
+        help='Races averaged per genome structure before its cached fitness is used.',
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        '--rungs',
+        help='Distances in m of the short races of successive halving, full races follow for the best genomes. '
+             'Fitness is then the race fitness on the last rung reached plus a fixed offset per rung.',
+        type=float,
+        nargs='*',
+        default=[]
+    )
+    parser.add_argument(
+        '--promote',
+        help='Share of genomes promoted to the next longer race.',
+        type=float,
+        default=0.5
+    )
+    parser.add_argument(
+        '--restore',
+        help='Checkpoint directory to resume from its latest generation, e.g. after a crash, or a neat-checkpoint-* file.',
+        default=None
+    )
+    parser.add_argument(
+        '--checkpoints',
+        help='Directory to write checkpoints of every generation to.',
+        default='checkpoints'
+    )
+    parser.add_argument(
+        '--journal',
+        help='Append-only file of finished evaluations replayed when resuming, empty to disable.',
+        default='evaluation-journal.jsonl'
+    )
+    args = parser.parse_args()
+
+    serverCommand = args.server_command
+    run(args.ports, args.prescreen, args.prescreen_keep, args.fitness_cache, args.samples, args.rungs, args.promote,
+        args.restore, args.journal, args.checkpoints)
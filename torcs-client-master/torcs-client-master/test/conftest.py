@@ -0,0 +1,46 @@
+import os
+
+import neat
+import pytest
+
+CONFIG = os.path.join(os.path.dirname(__file__), '..', 'myneat', 'config')
+
+
+def loadConfig():
+    """New configuration of the evolution, node keys are counted per configuration."""
+    return neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                       neat.DefaultSpeciesSet, neat.DefaultStagnation, CONFIG)
+
+
+@pytest.fixture(scope='module')
+def config():
+    return loadConfig()
+
+
+@pytest.fixture
+def genomes(config):
+    return list(neat.Population(config).population.items())[:4]
+
+
+class Crash(Exception):
+    pass
+
+
+class Races:
+    """
+    Evaluation stub recording the genomes raced and crashing after `crashAfter` races.
+    Fitness grows with each race of a genome, each result is passed to `onResult` if given.
+    """
+
+    def __init__(self, crashAfter=None):
+        self.crashAfter = crashAfter
+        self.raced = []
+
+    def __call__(self, genomes, config, onResult=None):
+        for genomeID, genome in genomes:
+            if len(self.raced) == self.crashAfter:
+                raise Crash()
+            self.raced.append(genomeID)
+            genome.fitness = genomeID + self.raced.count(genomeID)
+            if onResult is not None:
+                onResult(genomeID, genome)
@@ -1,4 +1,9 @@
-from pytocl.car import State, Command
+import pickle
+
+import numpy as np
+import pytest
+
+from pytocl.car import State, ArrayState, Command
 
 
 def test_command_array():
@@ -31,3 +36,21 @@ def test_state_array():
         3892.635153073154, 3943.4794278130635, 4090.970223435639, 4110.1872278843275,
         4.052
     )
+
+
+def test_array_state_pickle():
+    s = ArrayState(np.arange(79, dtype=float), {'foo': 'bar'})
+    restored = pickle.loads(pickle.dumps(s))
+
+    assert all(restored.values == s.values)
+    assert restored.extra == {'foo': 'bar'}
+    assert restored.gear == 6
+    assert tuple(restored.chain('gear', 'distances_from_edge'))[:3] == (6, 49.0, 50.0)
+
+
+def test_array_state_slots():
+    s = ArrayState(np.arange(79, dtype=float))
+
+    assert not hasattr(s, '__dict__')
+    with pytest.raises(AttributeError):
+        s.unknown = 1
@@ -0,0 +1,135 @@
+import os
+import random
+
+import neat
+import pytest
+
+from conftest import loadConfig
+from myneat.CheckpointStore import CheckpointStore
+
+
+def createConfig():
+    config = loadConfig()
+    # small population of few species, so generations share their elites:
+    config.pop_size = 30
+    config.species_set_config.compatibility_threshold = 10
+    config.no_fitness_termination = True
+    return config
+
+
+@pytest.fixture
+def config():
+    # node keys are counted per config, every run needs its own:
+    return createConfig()
+
+
+def evaluate(genomes, config):
+    for genomeID, genome in genomes:
+        genome.fitness = sum(connection.weight for connection in genome.connections.values())
+
+
+def structure(population):
+    return {key: (genome.nodes.keys(), {k: c.weight for k, c in genome.connections.items()})
+            for key, genome in population.items()}
+
+
+def evolve(config, path, generations, fullEvery=2):
+    random.seed(7)
+    population = neat.Population(config)
+    store = CheckpointStore(str(path), fullEvery)
+    population.add_reporter(store)
+    population.run(evaluate, generations)
+    return population, store
+
+
+def test_restore_latest(config, tmpdir):
+    population, _ = evolve(config, tmpdir, 5)
+
+    restored = CheckpointStore.restore(str(tmpdir))
+
+    assert CheckpointStore.generations(str(tmpdir)) == [1, 2, 3, 4, 5]
+    assert restored.generation == population.generation == 5
+    assert structure(restored.population) == structure(population.population)
+    assert restored.species.species.keys() == population.species.species.keys()
+
+
+def test_restore_continues_run(tmpdir):
+    uninterrupted, _ = evolve(createConfig(), tmpdir.mkdir('a'), 4)
+    evolve(createConfig(), tmpdir.mkdir('b'), 2)
+
+    restored = CheckpointStore.restore(str(tmpdir.join('b')))
+    restored.run(evaluate, 2)
+
+    assert restored.generation == 4
+    assert structure(restored.population) == structure(uninterrupted.population)
+
+
+class Contents(neat.reporting.BaseReporter):
+    """Records the content of every genome the store writes, populations and best genomes."""
+
+    def __init__(self):
+        self.stored = []
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.stored.append(content(best_genome))
+
+    def end_generation(self, config, population, species_set):
+        self.stored.extend(content(genome) for genome in population.values())
+
+
+def content(genome):
+    return (
+        genome.key,
+        tuple((k, n.bias, n.response, n.activation, n.aggregation) for k, n in sorted(genome.nodes.items())),
+        tuple((k, c.weight, c.enabled) for k, c in sorted(genome.connections.items()))
+    )
+
+
+def test_deltas_and_deduplication(config, tmpdir):
+    random.seed(7)
+    population = neat.Population(config)
+    contents = Contents()
+    population.add_reporter(CheckpointStore(str(tmpdir), 2))
+    population.add_reporter(contents)
+    population.run(evaluate, 4)
+
+    objects = os.listdir(str(tmpdir.join('objects')))
+    # one object per distinct genome, elites surviving several generations are stored once:
+    assert len(objects) == len(set(contents.stored))
+    assert len(objects) < len(contents.stored)
+
+    full = CheckpointStore.loadState(str(tmpdir), 2, LoaderStub())
+    delta = CheckpointStore.loadState(str(tmpdir), 3, LoaderStub())
+    assert full['base'] is None
+    assert delta['base'] == 2 and 0 < len(delta['added']) < len(full['added'])
+
+
+def test_best_genome(config, tmpdir):
+    population, _ = evolve(config, tmpdir, 3)
+
+    best = CheckpointStore.bestGenome(str(tmpdir))
+    assert best.fitness == population.best_genome.fitness
+    assert structure({0: best}) == structure({0: population.best_genome})
+
+    first = CheckpointStore.bestGenome(str(tmpdir), 0)
+    assert first.fitness <= best.fitness
+
+    with pytest.raises(KeyError):
+        CheckpointStore.bestGenome(str(tmpdir), 10)
+
+
+class LoaderStub:
+
+    def load(self, name):
+        return name
+
+
+def test_best_genome_ranked_by_race_fitness(config, tmpdir):
+    random.seed(7)
+    population = neat.Population(config)
+    population.add_reporter(CheckpointStore(str(tmpdir), raceFitness=lambda genome: -genome.fitness))
+    population.run(evaluate, 3)
+
+    worst = min((CheckpointStore.bestGenome(str(tmpdir), generation) for generation in range(3)),
+                key=lambda genome: genome.fitness)
+    assert CheckpointStore.bestGenome(str(tmpdir)).fitness == worst.fitness
@@ -0,0 +1,56 @@
+import pickle
+
+import neat
+import numpy as np
+import pytest
+
+from myneat.CompiledNetwork import CompiledNetwork
+
+
+def genome(config, key, mutations=0):
+    genome = config.genome_type(key)
+    genome.configure_new(config.genome_config)
+    for _ in range(mutations):
+        genome.mutate(config.genome_config)
+    return genome
+
+
+def assert_equivalent(genome, config):
+    net = neat.nn.FeedForwardNetwork.create(genome, config)
+    compiled = CompiledNetwork.create(genome, config)
+
+    inputs = np.random.default_rng(genome.key).normal(scale=3, size=(50, len(net.input_nodes)))
+    expected = np.array([net.activate(row) for row in inputs.tolist()])
+
+    assert np.allclose([compiled.activate(row) for row in inputs.tolist()], expected, rtol=0, atol=1e-12)
+    assert np.allclose(compiled.activateBatch(inputs), expected, rtol=0, atol=1e-12)
+
+
+def test_equivalent_to_feed_forward_network(config):
+    for key in range(10):
+        assert_equivalent(genome(config, key, mutations=3 * key), config)
+
+
+def test_mixed_activations_and_unconnected_output(config):
+    g = genome(config, 42, mutations=20)
+    for index, node in enumerate(g.nodes.values()):
+        node.activation = ('sigmoid', 'tanh', 'relu', 'identity')[index % 4]
+        node.response = 0.5 + index % 3
+    for key in list(g.connections):
+        if key[1] == config.genome_config.output_keys[-1]:
+            g.connections[key].enabled = False
+
+    assert_equivalent(g, config)
+    compiled = CompiledNetwork.create(g, config)
+    assert compiled.activate([1.0] * 22)[-1] == 0
+
+
+def test_pickled(config):
+    compiled = CompiledNetwork.create(genome(config, 1, mutations=5), config)
+    inputs = [0.5] * 22
+    assert pickle.loads(pickle.dumps(compiled)).activate(inputs) == compiled.activate(inputs)
+
+
+def test_wrong_number_of_inputs(config):
+    with pytest.raises(RuntimeError):
+        CompiledNetwork.create(genome(config, 1), config).activate([0.0] * 3)
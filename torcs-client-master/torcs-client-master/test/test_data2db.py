@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+
+from models.data2db import LAYOUT, keys, load, parseFile
+
+
+def logLine(offset, layout=LAYOUT):
+    values = iter(range(offset, offset + len(keys)))
+    return ''.join(
+        '(' + ' '.join([key] + [str(next(values)) for _ in range(count)]) + ')'
+        for key, count in layout
+    )
+
+
+@pytest.fixture
+def logs(tmpdir):
+    directory = tmpdir.mkdir('extended')
+    directory.join('alpine-1').write('\n'.join([logLine(0), logLine(1000)]) + '\n')
+    # keys in other order are decoded one by one:
+    directory.join('forza').write(logLine(2000, reversed(LAYOUT)) + '\n')
+    return directory
+
+
+def test_parse_file(logs):
+    rows = parseFile(str(logs.join('alpine-1')))
+
+    assert rows.shape == (2, len(keys))
+    assert rows[1].tolist() == list(range(1000, 1000 + len(keys)))
+
+
+def test_load(logs, tmpdir):
+    path = str(tmpdir.join('observations.db'))
+
+    assert load(str(logs), path, numberOfWorkers=2) == 3
+
+    db = sqlite3.connect(path)
+    assert db.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+    assert db.execute('SELECT track, accel, opponents35, focus4 FROM observations WHERE track = ?', ('alpine-1',)).fetchall() == [
+        ('alpine-1', 0.0, 50.0, len(keys) - 1.0),
+        ('alpine-1', 1000.0, 1050.0, 1000 + len(keys) - 1.0),
+    ]
+    assert db.execute("SELECT typeof(speedX) FROM observations WHERE track = 'forza'").fetchone() == ('real',)
+    # values of the reversed line still end up in their columns:
+    assert db.execute("SELECT focus0 FROM observations WHERE track = 'forza'").fetchone() == (2000.0,)
+    indexes = {name for name, in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert indexes == {'observations_track', 'observations_time'}
+    db.close()
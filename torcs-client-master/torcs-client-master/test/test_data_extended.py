@@ -0,0 +1,78 @@
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from models.data_extended import ExtendedSteeringData
+
+COLUMNS = ExtendedSteeringData.getDataColumns(None) + ['steer']
+
+
+@pytest.fixture
+def database(tmpdir):
+    path = str(tmpdir.join('trainingData.db'))
+
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE observations (track TEXT, ' + ', '.join(column + ' REAL' for column in COLUMNS) + ')')
+    for row in range(6):
+        db.execute(
+            'INSERT INTO observations VALUES (' + ', '.join('?' * (len(COLUMNS) + 1)) + ')',
+            ['forza' if row % 2 else 'alpine-1'] + [100 * row + column for column in range(len(COLUMNS))]
+        )
+    db.commit()
+    db.close()
+
+    return path
+
+
+def test_all_tracks(database, tmpdir):
+    data = ExtendedSteeringData(path=database, cacheDirectory=str(tmpdir.join('cache')))
+
+    inputs, targets = data[[5, 0]]
+
+    assert len(data) == 6
+    assert inputs.shape == (2, 34)
+    assert inputs[0, 0] == 500 and targets[0, 0] == 534
+    assert len(os.listdir(str(tmpdir.join('cache')))) == 2
+
+
+def test_track_filter(database, tmpdir):
+    data = ExtendedSteeringData('forza', database, str(tmpdir.join('cache')))
+
+    assert len(data) == 3
+    assert data[[0, 1, 2]][0][:, 0].tolist() == [100, 300, 500]
+
+    db = sqlite3.connect(database)
+    plan = ' '.join(str(step) for step in db.execute(
+        'EXPLAIN QUERY PLAN SELECT angle FROM observations WHERE track = ?', ('forza',)))
+    db.close()
+    assert 'observations_track' in plan
+
+
+def test_later_runs_map_cache(database, tmpdir):
+    cache = str(tmpdir.join('cache'))
+    ExtendedSteeringData('alpine-1', database, cache)
+    files = sorted(os.listdir(cache))
+
+    data = ExtendedSteeringData('alpine-1', database, cache)
+
+    assert isinstance(data.chunks[0][0], np.memmap)
+    assert sorted(os.listdir(cache)) == files
+    assert data[1][0][0] == 200
+
+
+def test_changed_database_invalidates_cache(database, tmpdir):
+    cache = str(tmpdir.join('cache'))
+    ExtendedSteeringData(path=database, cacheDirectory=cache)
+
+    db = sqlite3.connect(database)
+    db.execute('UPDATE observations SET angle = -1')
+    db.commit()
+    db.close()
+    os.utime(database, ns=(0, os.stat(database).st_mtime_ns + 1))
+
+    data = ExtendedSteeringData(path=database, cacheDirectory=cache)
+
+    assert len(os.listdir(cache)) == 4
+    assert data[0][0][0] == -1
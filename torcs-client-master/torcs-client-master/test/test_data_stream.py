@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from models.basicnetwork import SteeringNet
+from models.data_stream import StreamingSteeringData
+
+COLUMNS = StreamingSteeringData.getDataColumns(None) + ['steer']
+
+
+@pytest.fixture
+def database(tmpdir):
+    path = str(tmpdir.join('trainingData.db'))
+
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE observations (track TEXT, ' + ', '.join(column + ' REAL' for column in COLUMNS) + ')')
+    db.executemany(
+        'INSERT INTO observations VALUES (' + ', '.join('?' * (len(COLUMNS) + 1)) + ')',
+        [['forza' if row % 2 else 'alpine-1', row] + [0.0] * (len(COLUMNS) - 2) + [row / 100] for row in range(100)]
+    )
+    db.commit()
+    db.close()
+
+    return path
+
+
+def rows(batches):
+    return sorted(int(value) for inputs, _ in batches for value in inputs[:, 0].tolist())
+
+
+def test_epoch_holds_each_row_once(database):
+    data = StreamingSteeringData(path=database, chunkSize=7, bufferSize=20, batchSize=8)
+
+    batches = list(data)
+
+    assert rows(batches) == list(range(100))
+    assert all(len(inputs) <= 8 and inputs.shape[1] == 34 and targets.shape[1] == 1 for inputs, targets in batches)
+    assert all(targets[0, 0] == pytest.approx(inputs[0, 0] / 100) for inputs, targets in batches)
+
+
+def test_shuffled_per_epoch(database):
+    data = StreamingSteeringData(path=database, chunkSize=10, bufferSize=30, batchSize=10)
+
+    first = [inputs[:, 0].tolist() for inputs, _ in data]
+    second = [inputs[:, 0].tolist() for inputs, _ in data]
+
+    assert first != second
+    assert first[0] != sorted(first[0])
+
+
+def test_track_filter(database):
+    data = StreamingSteeringData('forza', database, chunkSize=16, bufferSize=10, batchSize=4)
+
+    assert rows(data) == list(range(1, 100, 2))
+
+
+def test_workers_share_chunks(database):
+    data = StreamingSteeringData(path=database, chunkSize=5, bufferSize=12, batchSize=3)
+
+    loader = DataLoader(data, batch_size=None, num_workers=2)
+
+    assert rows(loader) == list(range(100))
+
+
+def test_train_net(database, tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    tmpdir.mkdir('models').mkdir('models').mkdir('steering')
+    torch.manual_seed(0)
+
+    losses = SteeringNet.getPlainNetwork().trainNet(
+        StreamingSteeringData(path=database, chunkSize=10, bufferSize=40), numberOfEpochs=2, batchSize=16)
+
+    assert len(losses) == 2
@@ -0,0 +1,85 @@
+from pytocl.car import State as CarState
+from pytocl.evaluation import TerminationPolicy
+
+
+def state(time, position=0, speed=100, distance=None, damage=0, last_lap=0):
+    """Car state with given lap time, track position and speed in km/h."""
+    return CarState({
+        'angle': 0, 'curLapTime': time, 'damage': damage,
+        'distFromStart': 0, 'distRaced': time * 10 if distance is None else distance,
+        'fuel': 90, 'gear': 1, 'lastLapTime': last_lap, 'opponents': [200] * 36,
+        'racePos': 1, 'rpm': 4000, 'speedX': speed, 'speedY': 0, 'speedZ': 0,
+        'track': [10] * 19, 'trackPos': position, 'wheelSpinVel': [0] * 4, 'z': 0,
+        'focus': [-1] * 5,
+    })
+
+
+def run(policy, states):
+    """Feeds states to policy, returning tick and reason it fired at."""
+    for tick, carstate in enumerate(states):
+        reason = policy.update(carstate)
+        if reason:
+            return tick, reason
+    return None
+
+
+def test_disabled_policy_never_fires():
+    policy = TerminationPolicy()
+    states = [state(0.02 * i, position=2, speed=0, damage=1000, last_lap=5) for i in range(1000)]
+    assert run(policy, states) is None
+
+
+def test_off_track_time():
+    policy = TerminationPolicy(max_off_track_time=1)
+    states = [state(0.25 * i, position=1.5 if 10 <= i < 13 or i >= 20 else 0) for i in range(50)]
+    # first excursion is too short, second one exceeds a second at tick 24:
+    assert run(policy, states) == (24, 'off track')
+
+
+def test_stuck_time_after_grace_time():
+    policy = TerminationPolicy(max_stuck_time=2, grace_time=10)
+    states = [state(0.5 * i, speed=0) for i in range(60)]
+    assert run(policy, states) == (24, 'stuck')
+
+
+def test_damage_and_lap():
+    assert run(TerminationPolicy(max_damage=100), [state(1, damage=50), state(2, damage=150)]) \
+        == (1, 'damage')
+
+    unknown = state(1, damage=150)
+    unknown.damage = None
+    assert run(TerminationPolicy(max_damage=100), [unknown]) is None
+    assert run(TerminationPolicy(stop_on_lap=True), [state(1), state(0.02, last_lap=80)]) \
+        == (1, 'lap completed')
+
+
+def test_no_progress():
+    policy = TerminationPolicy(min_progress=50, progress_window=10, grace_time=0)
+    # 100 m in first 10 s, then crawling at 1 m/s:
+    states = [state(t, distance=10 * t if t <= 10 else 100 + t - 10) for t in range(40)]
+    assert run(policy, states) == (20, 'no progress')
+
+    policy.reset()
+    assert run(policy, states[20:]) == (10, 'no progress')
+
+
+def test_stuck_and_no_progress_in_later_lap():
+    # first lap driven, car stands still for 60 s of the second lap:
+    states = [state(t, distance=10 * t) for t in range(100)] + \
+        [state(t, speed=0, distance=1000, last_lap=100) for t in range(60)]
+
+    policy = TerminationPolicy(min_progress=20, progress_window=10)
+    assert run(policy, states) == (111, 'no progress')
+
+    policy = TerminationPolicy(max_stuck_time=3)
+    assert run(policy, states) == (104, 'stuck')
+
+
+def test_budget():
+    policy = TerminationPolicy(max_time=5)
+    # race time continues over a new lap:
+    states = [state(t) for t in range(4)] + [state(t, last_lap=4) for t in range(4)]
+    assert run(policy, states) == (7, 'time budget')
+
+    policy = TerminationPolicy(max_distance=100)
+    assert run(policy, [state(t) for t in range(20)]) == (11, 'distance budget')
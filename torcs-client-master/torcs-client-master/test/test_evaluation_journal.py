@@ -0,0 +1,59 @@
+import copy
+
+import pytest
+
+from conftest import Crash, Races
+from myneat.EvaluationJournal import EvaluationJournal
+
+
+def test_resume_after_crash(config, genomes, tmpdir):
+    path = str(tmpdir.join('journal.jsonl'))
+
+    journal = EvaluationJournal(path)
+    journal.start_generation(3)
+    crashing = Races(crashAfter=2)
+    with pytest.raises(Crash):
+        journal.wrap(crashing, 'rung')(genomes, config)
+    journal.close()
+
+    # crash while writing a line:
+    with open(path, 'a') as file:
+        file.write('{"generation": 3, "gen')
+
+    for _, genome in genomes:
+        genome.fitness = None
+    journal = EvaluationJournal(path)
+    journal.start_generation(3)
+    resumed = Races()
+    journal.wrap(resumed, 'rung')(genomes, config)
+
+    assert crashing.raced == [genomeID for genomeID, _ in genomes[:2]]
+    assert resumed.raced == [genomeID for genomeID, _ in genomes[2:]]
+    assert journal.replayed == 2
+    assert [genome.fitness for genomeID, genome in genomes] == [genomeID + 1 for genomeID, _ in genomes]
+    journal.close()
+
+    journal = EvaluationJournal(path)
+    assert len(journal.entries) == len(genomes)
+    journal.close()
+
+
+def test_replays_matching_entries_only(config, genomes, tmpdir):
+    path = str(tmpdir.join('journal.jsonl'))
+    journal = EvaluationJournal(path)
+    journal.start_generation(0)
+    journal.wrap(Races(), 'a')(genomes[:1], config)
+    journal.close()
+
+    genomeID, genome = genomes[0]
+    changed = copy.deepcopy(genome)
+    changed.nodes[0].bias += 1
+
+    journal = EvaluationJournal(path)
+    journal.start_generation(0)
+    assert journal.lookup(genomeID, genome, 'a') == genomeID + 1
+    assert journal.lookup(genomeID, changed, 'a') is None
+    assert journal.lookup(genomeID, genome, 'b') is None
+    journal.start_generation(1)
+    assert journal.lookup(genomeID, genome, 'a') is None
+    journal.close()
@@ -0,0 +1,74 @@
+import copy
+
+import neat
+import pytest
+
+from conftest import Races
+from myneat.FitnessCache import FitnessCache, genomeHash
+
+
+def test_genome_hash(config, genomes):
+    genome = genomes[0][1]
+    clone = copy.deepcopy(genome)
+    clone.key = 1000
+    assert genomeHash(clone) == genomeHash(genome)
+
+    connection = next(c for c in clone.connections.values() if c.enabled)
+    connection.weight += 1e-12
+    assert genomeHash(clone) != genomeHash(genome)
+    connection.weight -= 1e-12
+    connection.enabled = False
+    assert genomeHash(clone) != genomeHash(genome)
+
+    assert len({genomeHash(g) for _, g in genomes}) == len(genomes)
+
+
+def test_cache_hits_and_duplicates(config, genomes):
+    races = Races()
+    cache = FitnessCache(races)
+
+    clone = copy.deepcopy(genomes[0][1])
+    clone.key = 99
+    cache.evaluate_genomes(genomes + [(99, clone)], config)
+    assert sorted(races.raced) == sorted(genomeID for genomeID, _ in genomes)
+    assert clone.fitness == genomes[0][1].fitness
+    assert cache.hitRate == pytest.approx(1 / 5)
+
+    cache.evaluate_genomes(genomes, config)
+    assert len(races.raced) == len(genomes)
+    assert cache.hitRate == pytest.approx(5 / 9)
+
+
+def test_resamples_and_persistence(config, genomes, tmpdir):
+    path = str(tmpdir.join('fitness-cache'))
+    races = Races()
+    reporters = neat.reporting.ReporterSet()
+    infos = []
+    reporters.info = infos.append
+
+    FitnessCache(races, samples=2, path=path, reporters=reporters).evaluate_genomes(genomes[:1], config)
+    genomeID, genome = genomes[0]
+    assert genome.fitness == genomeID + 1
+    assert infos and '0 of 1' in infos[0]
+
+    # restored run, second sample still missing:
+    cache = FitnessCache(races, samples=2, path=path)
+    assert not cache.isCached(genome)
+    cache.evaluate_genomes(genomes[:1], config)
+    assert genome.fitness == genomeID + 1.5
+    assert cache.isCached(genome) and not cache.isCached(genomes[1][1])
+
+    cache = FitnessCache(races, samples=2, path=path)
+    cache.evaluate_genomes(genomes[:1], config)
+    assert races.raced == [genomeID, genomeID]
+    assert cache.hitRate == 1
+
+
+def test_new_run_ignores_saved_cache(config, genomes, tmpdir):
+    path = str(tmpdir.join('fitness-cache'))
+    races = Races()
+
+    FitnessCache(races, path=path).evaluate_genomes(genomes[:1], config)
+    FitnessCache(races, path=path, resume=False).evaluate_genomes(genomes[:1], config)
+
+    assert len(races.raced) == 2
@@ -0,0 +1,84 @@
+import asyncio
+from unittest import mock
+
+from pytocl.driver import Driver
+from pytocl.multiclient import ClientManager
+from pytocl.protocol import Client, State
+
+SENSOR_MESSAGE = '(angle 0.1)(curLapTime {})(damage 0)(distFromStart 10)(distRaced 10)' \
+                 '(fuel 90)(gear 1)(lastLapTime 0)(racePos 1)(rpm 4000)(speedX 50)' \
+                 '(speedY 0)(speedZ 0)(trackPos 0.1)(z 0.3)'
+
+
+def sensor_message(tick):
+    return SENSOR_MESSAGE.format(0.02 * (tick + 1)).encode()
+
+
+class FakeServer(asyncio.DatagramProtocol):
+    """Identifies a client, sends it sensor messages and shuts it down."""
+
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.replies = []
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if data.startswith(b'SCR-'):
+            self.transport.sendto(b'***identified***', addr)
+            self.transport.sendto(sensor_message(0), addr)
+            return
+
+        self.replies.append(data)
+        if len(self.replies) < self.ticks:
+            self.transport.sendto(sensor_message(len(self.replies)), addr)
+        else:
+            self.transport.sendto(b'***shutdown***', addr)
+
+
+def test_manager_drives_several_cars():
+    async def race():
+        loop = asyncio.get_running_loop()
+        servers = []
+        for ticks in (3, 5):
+            transport, server = await loop.create_datagram_endpoint(
+                lambda: FakeServer(ticks), local_addr=('127.0.0.1', 0)
+            )
+            servers.append((transport, server))
+
+        manager = ClientManager()
+        drivers = [mock.MagicMock(wraps=Driver(False)) for _ in servers]
+        for driver, (transport, _) in zip(drivers, servers):
+            driver.range_finder_angles = Driver(False).range_finder_angles
+            manager.add(driver, transport.get_extra_info('sockname')[1], '127.0.0.1')
+
+        await asyncio.wait_for(manager.run_async(), 5)
+
+        for transport, _ in servers:
+            transport.close()
+        return manager, drivers, servers
+
+    manager, drivers, servers = asyncio.run(race())
+
+    assert all(c.state is State.STOPPED for c in manager.clients)
+    assert [len(s.replies) for _, s in servers] == [3, 5]
+    assert all(r.startswith(b'(accel ') for _, s in servers for r in s.replies)
+    assert [d.drive.call_count for d in drivers] == [3, 5]
+    assert [d.on_shutdown.call_count for d in drivers] == [1, 1]
+
+    report = manager.latency_report()
+    assert sorted(profiler.tick.count for profiler in report.values()) == [3, 5]
+    assert all(profiler.stages['drive'].max > 0 for profiler in report.values())
+
+
+def test_handle_message_without_socket():
+    driver = mock.MagicMock()
+    client = Client(driver=driver)
+
+    assert client.handle_message(b'') is None
+    client.state = State.RUNNING
+    assert client.handle_message(b'***restart***') is None
+    assert driver.on_restart.call_count == 1
+    # driver registers again for the restarted race:
+    assert client.state is State.STARTING
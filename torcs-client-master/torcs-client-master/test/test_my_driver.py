@@ -0,0 +1,17 @@
+import numpy as np
+
+from my_driver import MyDriver
+from pytocl.protocol import BufferSerializer, Serializer
+from test_protocol import SERVER_MESSAGE
+
+
+def test_state2sample_from_raw_values(tmpdir):
+    driver = MyDriver(net=object(), roadmapFile=str(tmpdir.join('roadmap')))
+
+    expected = driver.state2sample(Serializer().decode_state(SERVER_MESSAGE))
+    sample = driver.state2sample(BufferSerializer().decode_state(SERVER_MESSAGE))
+
+    # the driver's own buffer, no list or new array per tick:
+    assert sample is driver.sample
+    assert np.allclose(sample, expected, rtol=0, atol=1e-12)
+    driver.on_shutdown()
@@ -0,0 +1,108 @@
+import sqlite3
+
+import neat
+import numpy as np
+import pytest
+
+from myneat.CompiledNetwork import CompiledNetwork
+from myneat.PreScreening import NETWORK_INPUT_COLUMNS, PreScreener, screen, telemetryFromDatabase
+
+
+@pytest.fixture
+def telemetry():
+    rng = np.random.default_rng(1)
+    inputs = rng.normal(size=(200, 22))
+    inputs[:, 1] = rng.uniform(-1, 1, size=200)
+    return inputs, -0.3 * inputs[:, 1]
+
+
+class ConstantNetwork:
+
+    def __init__(self, steering):
+        self.steering = steering
+
+    def activateBatch(self, inputs):
+        return np.full((len(inputs), 3), self.steering + 0.5)
+
+
+def test_screen(telemetry):
+    inputs, steering = telemetry
+    nearEdge = np.abs(inputs[:, 1]) > 0.8
+    left = np.count_nonzero(nearEdge & (inputs[:, 1] > 0)) / np.count_nonzero(nearEdge)
+
+    screening = screen(ConstantNetwork(0.2), inputs, steering, unsafeWeight=2)
+    assert screening.imitationError == pytest.approx(np.mean(np.abs(0.2 - steering)))
+    assert screening.unsafeRate == pytest.approx(left)
+    assert screening.loss == pytest.approx(screening.imitationError + 2 * left)
+
+
+def test_telemetry_from_database(tmpdir):
+    path = str(tmpdir.join('trainingData.db'))
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE observations (track, steer, ' + ', '.join(NETWORK_INPUT_COLUMNS) + ')')
+    for track in ('alpine_1', 'forza'):
+        for i in range(3):
+            db.execute('INSERT INTO observations VALUES (?, ?' + ', ?' * 22 + ')', [track, -i] + [i] * 22)
+    db.commit()
+    db.close()
+
+    inputs, steering = telemetryFromDatabase(path, track='forza')
+    assert inputs.shape == (3, 22)
+    assert steering.tolist() == [0, -1, -2]
+    assert telemetryFromDatabase(path, limit=4)[0].shape == (4, 22)
+
+
+def test_pre_screener(config, telemetry):
+    inputs, steering = telemetry
+    population = neat.Population(config).population
+    genomes = list(population.items())[:10]
+
+    live = []
+
+    def evaluate(genomes, config):
+        for genomeID, genome in genomes:
+            live.append(genomeID)
+            genome.fitness = 100 + genomeID
+
+    screener = PreScreener(evaluate, inputs, steering, keepFraction=0.3)
+    screener.evaluate_genomes(genomes, config)
+
+    losses = {
+        genomeID: screen(CompiledNetwork.create(genome, config), inputs, steering).loss
+        for genomeID, genome in genomes
+    }
+    ranked = sorted(losses, key=losses.get)
+    assert sorted(live) == sorted(ranked[:3])
+
+    worst = min(100 + genomeID for genomeID in live)
+    discarded = [population[genomeID].fitness for genomeID in ranked[3:]]
+    assert max(discarded) < worst
+    assert discarded == sorted(discarded, reverse=True)
+
+    live.clear()
+    PreScreener(evaluate, inputs, steering, keepFraction=1, minKept=2, maxLoss=-1).evaluate_genomes(genomes, config)
+    assert sorted(live) == sorted(ranked[:2])
+
+
+def test_pre_screener_bypass(config, telemetry):
+    inputs, steering = telemetry
+    genomes = list(neat.Population(config).population.items())[:10]
+
+    losses = {
+        genomeID: screen(CompiledNetwork.create(genome, config), inputs, steering).loss
+        for genomeID, genome in genomes
+    }
+    worstID = max(losses, key=losses.get)
+
+    live = []
+
+    def evaluate(genomes, config):
+        for genomeID, genome in genomes:
+            live.append(genomeID)
+            genome.fitness = 100.0
+
+    screener = PreScreener(evaluate, inputs, steering, keepFraction=0.2, bypass=lambda genome: genome.key == worstID)
+    screener.evaluate_genomes(genomes, config)
+
+    assert worstID in live and len(live) == 3
+    assert worstID not in screener.screenings
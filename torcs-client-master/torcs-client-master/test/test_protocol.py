@@ -1,8 +1,12 @@
+import socket
 from unittest import mock
 
-from pytocl.protocol import Serializer, Client, State
+import numpy as np
+
+from pytocl.protocol import Serializer, BufferSerializer, Client, State
 from pytocl.driver import Driver
-from pytocl.car import State as CarState, Command
+from pytocl.car import State as CarState, Command, DEGREE_PER_RADIANS
+from pytocl.evaluation import TerminationPolicy
 
 
 def test_init_encoding():
@@ -15,28 +19,31 @@ def test_init_encoding():
     assert encoded == b'SCR(init -90 -75 -60 -45 -30 -20 -15 -10 -5 0 5 10 15 20 30 45 60 75 90)'
 
 
+SERVER_MESSAGE = b'(angle 0.008838)' \
+                 b'(curLapTime 4.052)' \
+                 b'(damage 0)' \
+                 b'(distFromStart 1015.56)' \
+                 b'(distRaced 42.6238)' \
+                 b'(fuel 93.9356)' \
+                 b'(gear 3)' \
+                 b'(lastLapTime 0)' \
+                 b'(opponents 123.4 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200' \
+                 b' 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200)' \
+                 b'(racePos 1)' \
+                 b'(rpm 4509.31)' \
+                 b'(speedX 81.5135)' \
+                 b'(speedY 0.40771)' \
+                 b'(speedZ -2.4422)' \
+                 b'(track 4.3701 4.52608 5.02757 6.07753 8.25773 11.1429 13.451 16.712 21.5022' \
+                 b' 30.2855 51.8667 185.376 69.9077 26.6353 12.6621 8.2019 6.5479 5.82979 5.63029)' \
+                 b'(trackPos 0.126012)' \
+                 b'(wheelSpinVel 67.9393 68.8267 71.4009 71.7363)' \
+                 b'(z 0.336726)' \
+                 b'(focus 26.0077 27.9798 30.2855 33.0162 36.3006)'
+
+
 def test_decode_server_message():
-    buffer = b'(angle 0.008838)' \
-             b'(curLapTime 4.052)' \
-             b'(damage 0)' \
-             b'(distFromStart 1015.56)' \
-             b'(distRaced 42.6238)' \
-             b'(fuel 93.9356)' \
-             b'(gear 3)' \
-             b'(lastLapTime 0)' \
-             b'(opponents 123.4 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200' \
-             b' 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200 200)' \
-             b'(racePos 1)' \
-             b'(rpm 4509.31)' \
-             b'(speedX 81.5135)' \
-             b'(speedY 0.40771)' \
-             b'(speedZ -2.4422)' \
-             b'(track 4.3701 4.52608 5.02757 6.07753 8.25773 11.1429 13.451 16.712 21.5022' \
-             b' 30.2855 51.8667 185.376 69.9077 26.6353 12.6621 8.2019 6.5479 5.82979 5.63029)' \
-             b'(trackPos 0.126012)' \
-             b'(wheelSpinVel 67.9393 68.8267 71.4009 71.7363)' \
-             b'(z 0.336726)' \
-             b'(focus 26.0077 27.9798 30.2855 33.0162 36.3006)'
+    buffer = SERVER_MESSAGE
 
     d = Serializer().decode(buffer)
 
@@ -88,6 +95,7 @@ def test_special_messages(mock_socket_ctor):
 
     mock_socket.recvfrom = mock.MagicMock(side_effect=[(b'***identified***', None),
                                                        (b'***restart***', None),
+                                                       (b'***identified***', None),
                                                        (b'***shutdown***', None)])
 
     client.run()
@@ -96,6 +104,8 @@ def test_special_messages(mock_socket_ctor):
     # not supported on server side
     assert mock_driver.on_restart.call_count == 1
     assert mock_driver.on_shutdown.call_count == 1
+    # registered again after the restart:
+    assert [c[0][0].startswith(b'SCR') for c in mock_socket.sendto.call_args_list] == [True, True]
 
 
 def test_buffer_regression_1():
@@ -118,3 +128,256 @@ def test_encode_command():
     buffer = Serializer().encode(c.actuator_dict)
     assert b'(accel 0.0)' in buffer
     assert b'(clutch 0)' in buffer
+
+
+def test_encode_command_template():
+    s = Serializer()
+    c = Command()
+    assert s.encode_command(c) == s.encode(c.actuator_dict)
+
+    c.accelerator = 1
+    c.gear = 3
+    c.steering = np.float32(-0.123)
+    c.focus = 0.1 + 0.2
+    assert s.encode_command(c) == s.encode(c.actuator_dict)
+    assert s.encode_command(c) == b'(accel 1)(brake 0.0)(gear 3)(steer -0.123)(clutch 0)' \
+                                  b'(focus 0.30000000000000004)(meta 0)'
+
+    c.brake = None
+    assert s.encode_command(c) == s.encode(c.actuator_dict)
+    assert b'brake' not in s.encode_command(c)
+
+
+def test_buffer_decode_server_message():
+    s = BufferSerializer()
+    values = s.decode_values(SERVER_MESSAGE)
+
+    assert values is s.values
+    assert values.shape == (79,)
+    assert not s.extra
+    assert values[s.slices['angle']] == 0.008838
+    assert values[s.slices['gear']] == 3
+    assert values[s.slices['opponents']][0] == 123.4
+    assert tuple(values[s.slices['track']]) == (
+        4.3701, 4.52608, 5.02757, 6.07753, 8.25773, 11.1429, 13.451, 16.712, 21.5022, 30.2855,
+        51.8667, 185.376, 69.9077, 26.6353, 12.6621, 8.2019, 6.5479, 5.82979, 5.63029)
+    assert tuple(values[s.slices['focus']]) == (26.0077, 27.9798, 30.2855, 33.0162, 36.3006)
+
+    # identical to string based decoding:
+    d = Serializer().decode(SERVER_MESSAGE)
+    for key, value in d.items():
+        expected = [float(v) for v in (value if isinstance(value, list) else [value])]
+        assert list(values[s.slices[key]]) == expected
+
+
+def test_buffer_decode_fallback():
+    s = BufferSerializer()
+    s.decode_values(SERVER_MESSAGE)
+
+    # reordered, incomplete and unknown keys:
+    values = s.decode_values(b'(z 0.25)(angle 0.5)(wheelSpinVel 1 2)(custom a b)\x00')
+    assert values[s.slices['z']] == 0.25
+    assert values[s.slices['angle']] == 0.5
+    assert np.isnan(values[s.slices['wheelSpinVel']]).all()
+    assert np.isnan(values[s.slices['track']]).all()
+    assert s.extra == {'custom': ['a', 'b']}
+
+    # back on the fast path:
+    s.decode_values(SERVER_MESSAGE)
+    assert values[s.slices['z']] == 0.336726
+    assert not s.extra
+
+
+def test_buffer_decode_state():
+    expected = CarState(Serializer().decode(SERVER_MESSAGE))
+    c = BufferSerializer().decode_state(SERVER_MESSAGE)
+
+    for name in ('angle', 'current_lap_time', 'damage', 'distance_from_start', 'distance_raced',
+                 'fuel', 'gear', 'last_lap_time', 'race_position', 'rpm', 'speed_x', 'speed_y',
+                 'speed_z', 'distance_from_center', 'z'):
+        assert getattr(c, name) == getattr(expected, name), name
+    for name in ('opponents', 'distances_from_edge', 'wheel_velocities',
+                 'focused_distances_from_edge'):
+        assert tuple(getattr(c, name)) == getattr(expected, name), name
+
+    assert tuple(c.chain('angle', 'wheel_velocities', 'current_lap_time')) == \
+        tuple(expected.chain('angle', 'wheel_velocities', 'current_lap_time'))
+    assert list(c.raw('angle', 'trackPos')) == [0.008838, 0.126012]
+
+    # views into the state's own copy of the values:
+    assert c.distances_from_edge.base is c.values
+    assert c.focused_distances_from_egde_valid
+    c.focused_distances_from_edge = (-1.0, -1.0, -1.0, -1.0, -1.0)
+    assert not c.focused_distances_from_egde_valid
+
+
+def test_buffer_decode_state_missing_values():
+    c = BufferSerializer().decode_state(b'(angle 0.5)(foo bar)')
+
+    assert c.angle == 0.5 * DEGREE_PER_RADIANS
+    assert c.gear is None
+    assert np.isnan(c.rpm)
+    assert c.extra == {'foo': 'bar'}
+
+
+@mock.patch('pytocl.protocol.socket.socket')
+def test_drain_mode(mock_socket_ctor):
+    mock_socket = mock.MagicMock()
+    mock_socket_ctor.return_value = mock_socket
+    mock_driver = mock.MagicMock()
+    mock_driver.range_finder_angles = Driver(False).range_finder_angles
+    mock_driver.drive.return_value = Command()
+    client = Client(driver=mock_driver, drain=True)
+
+    def sensors(time):
+        return SERVER_MESSAGE.replace(b'4.052', str(time).encode()), None
+
+    mock_socket.recvfrom = mock.MagicMock(side_effect=[
+        (b'***identified***', None),
+        # driver fell behind, two outdated messages queued:
+        sensors(1), sensors(2), sensors(3), BlockingIOError(),
+        # restart invalidates earlier message:
+        sensors(4), (b'***restart***', None), (b'***identified***', None),
+        sensors(5), BlockingIOError(),
+        sensors(6), BlockingIOError(),
+        (b'***shutdown***', None), sensors(7),
+    ])
+
+    client.run()
+    assert client.state is State.STOPPED
+
+    lap_times = [c[0][0].current_lap_time for c in mock_driver.drive.call_args_list]
+    assert lap_times == [3, 5, 6]
+    assert mock_driver.on_restart.call_count == 1
+    assert mock_driver.on_shutdown.call_count == 1
+    assert mock_socket.sendto.call_count == 2 + 3
+    assert client.skipped_messages == 3
+    assert client.max_backlog == 2
+    assert client.backlog == 0
+
+
+@mock.patch('pytocl.protocol.socket.socket')
+def test_termination_policy_requests_restart(mock_socket_ctor):
+    mock_socket = mock.MagicMock()
+    mock_socket_ctor.return_value = mock_socket
+    mock_driver = mock.MagicMock()
+    mock_driver.range_finder_angles = Driver(False).range_finder_angles
+    mock_driver.drive.return_value = Command()
+    client = Client(driver=mock_driver, termination_policy=TerminationPolicy(max_damage=100))
+
+    damaged = SERVER_MESSAGE.replace(b'(damage 0)', b'(damage 200)')
+    mock_socket.recvfrom = mock.MagicMock(side_effect=[
+        (b'***identified***', None),
+        (SERVER_MESSAGE, None), (damaged, None), (SERVER_MESSAGE, None),
+    ])
+
+    result = client.run()
+    assert client.state is State.STOPPED
+    assert result.terminated == 'damage'
+    assert result.ticks == 2
+    assert mock_driver.drive.call_count == 1
+    assert mock_driver.on_shutdown.call_count == 1
+    assert mock_socket.sendto.call_args[0][0].endswith(b'(meta 1)')
+
+
+def mock_driver():
+    driver = mock.MagicMock()
+    driver.range_finder_angles = Driver(False).range_finder_angles
+    driver.drive.return_value = Command()
+    return driver
+
+
+class ScriptedServer:
+    """Mock socket playing races like the SCR server.
+
+    Each race's messages, ending with a restart or shutdown message, are only
+    sent once the client registered with an init message, the server closes
+    the connection in between.
+    """
+
+    def __init__(self, *races):
+        self.races = list(races)
+        self.pending = []
+        self.registrations = 0
+        self.replies = []
+        self.timeouts = 0
+
+    def settimeout(self, timeout):
+        pass
+
+    def sendto(self, buffer, addr):
+        if not buffer.startswith(b'SCR'):
+            self.replies.append(buffer)
+        elif not self.pending and self.races:
+            self.registrations += 1
+            self.pending = [b'***identified***'] + self.races.pop(0)
+
+    def recvfrom(self, size):
+        if not self.pending:
+            self.timeouts += 1
+            assert self.timeouts < 10, 'client waits for messages of an unregistered race'
+            raise socket.timeout('timed out')
+        return self.pending.pop(0), None
+
+
+@mock.patch('pytocl.protocol.socket.socket')
+def test_run_batch_on_one_connection(mock_socket_ctor):
+    damaged = SERVER_MESSAGE.replace(b'(damage 0)', b'(damage 200)')
+    server = ScriptedServer(
+        # first driver, restart requested at second message:
+        [SERVER_MESSAGE, damaged, SERVER_MESSAGE, b'***restart***'],
+        # same driver again:
+        [damaged, b'***restart***'],
+        # second driver:
+        [SERVER_MESSAGE, SERVER_MESSAGE, damaged, b'***restart***'],
+    )
+    mock_socket_ctor.return_value = server
+    drivers = [mock_driver(), mock_driver()]
+    client = Client(termination_policy=TerminationPolicy(max_damage=100))
+
+    results = client.run_batch(iter([drivers[0], drivers[0], drivers[1]]))
+    assert client.state is State.STOPPED
+    assert [r.ticks for r in results] == [2, 1, 3]
+    assert [r.terminated for r in results] == ['damage'] * 3
+    assert server.registrations == 3 and not server.races
+
+    assert drivers[0].drive.call_count == 1
+    assert drivers[0].on_restart.call_count == 1
+    assert drivers[0].on_shutdown.call_count == 1
+    assert drivers[1].drive.call_count == 2
+    assert drivers[1].on_shutdown.call_count == 1
+
+    assert [r.endswith(b'(meta 1)') for r in server.replies] == \
+        [False, True, False, True, False, False, True]
+    assert b'(brake 1)' in server.replies[2]
+
+
+@mock.patch('pytocl.protocol.socket.socket')
+def test_run_batch_records_race_without_sensor_message(mock_socket_ctor):
+    damaged = SERVER_MESSAGE.replace(b'(damage 0)', b'(damage 200)')
+    server = ScriptedServer(
+        [SERVER_MESSAGE, damaged, b'***restart***'],
+        # restarted before the second driver got any message:
+        [b'***restart***'],
+        [damaged, b'***restart***'],
+    )
+    mock_socket_ctor.return_value = server
+    drivers = [mock_driver(), mock_driver(), mock_driver()]
+    client = Client(termination_policy=TerminationPolicy(max_damage=100))
+
+    results = client.run_batch(iter(drivers))
+
+    # results match drivers by position:
+    assert [r.ticks for r in results] == [2, 0, 1]
+    assert [r.terminated for r in results] == ['damage', None, 'damage']
+    assert [d.drive.call_count for d in drivers] == [1, 0, 0]
+
+
+def test_driver_on_restart_resets_controllers():
+    driver = Driver(False)
+    driver.drive(Serializer().decode_state(SERVER_MESSAGE))
+    assert driver.steering_ctrl.controllers[1].integral
+
+    driver.on_restart()
+    assert driver.steering_ctrl.controllers[1].integral == 0
+    assert driver.steering_ctrl.controllers[2].last_timestamp == 0
@@ -0,0 +1,95 @@
+import pickle
+import time
+
+import numpy as np
+
+from roadmap import Roadmap
+
+
+def test_roadmap_grows_and_flushes(tmpdir):
+    path = str(tmpdir.join('roadmap'))
+    roadmap = Roadmap(path, flushInterval=None, capacity=2)
+
+    for value in (0.1, 0.5, 0.2):
+        roadmap.append(value)
+
+    assert len(roadmap) == 3
+    assert list(roadmap[1:10]) == [0.5, 0.2]
+    assert roadmap[1:10].max() == 0.5
+
+    roadmap.close()
+    with open(path, 'rb') as file:
+        assert pickle.load(file) == [0.1, 0.5, 0.2]
+
+
+def test_roadmap_load_existing_file(tmpdir):
+    path = str(tmpdir.join('roadmap'))
+    with open(path, 'wb') as file:
+        pickle.dump([0.3, 0.01], file)
+
+    roadmap = Roadmap.load(path, flushInterval=None)
+    assert list(roadmap[:]) == [0.3, 0.01]
+
+    roadmap.append(0.7)
+    roadmap.close()
+    with open(path, 'rb') as file:
+        assert pickle.load(file) == [0.3, 0.01, 0.7]
+
+
+def test_roadmap_background_flush(tmpdir):
+    path = tmpdir.join('roadmap')
+    roadmap = Roadmap(str(path), flushInterval=0.01)
+    roadmap.append(0.4)
+
+    for _ in range(100):
+        if path.exists() and pickle.loads(path.read_binary()) == [0.4]:
+            break
+        time.sleep(0.01)
+    else:
+        assert False, 'roadmap not flushed'
+
+    roadmap.close()
+
+
+def test_roadmap_lookahead_maxima(tmpdir):
+    random = np.random.RandomState(42)
+    values = random.rand(300)
+    roadmap = Roadmap(None, capacity=8, lookaheads=(30, 100, 200))
+
+    for value in values:
+        roadmap.append(value)
+
+        # matches scanning the slice ahead at every length:
+        for position in random.randint(0, len(roadmap), 5):
+            for lookahead in (30, 100, 200):
+                expected = max(values[position:min(len(roadmap), position + lookahead // 10)])
+                assert roadmap.maxAhead(position, lookahead) == expected
+
+    assert np.isnan(roadmap.maxAhead(300))
+
+    path = str(tmpdir.join('roadmap'))
+    with open(path, 'wb') as file:
+        pickle.dump(values.tolist(), file)
+    loaded = Roadmap.load(path, flushInterval=None, lookaheads=(30, 100, 200))
+    for lookahead in (30, 100, 200):
+        assert all(loaded.maxima[lookahead][:300] == roadmap.maxima[lookahead][:300])
+    loaded.close()
+
+
+def test_roadmap_clear(tmpdir):
+    path = str(tmpdir.join('roadmap'))
+    roadmap = Roadmap(path, flushInterval=None, segmentLength=10, lookaheads=(30,))
+    for value in (0.9, 0.8, 0.7):
+        roadmap.append(value)
+
+    roadmap.clear()
+    for value in (0.1, 0.2):
+        roadmap.append(value)
+
+    assert len(roadmap) == 2
+    assert roadmap.maxAhead(0, 30) == 0.2
+    assert np.isnan(roadmap.maxAhead(2, 30))
+
+    roadmap.close()
+    with open(path, 'rb') as file:
+        assert pickle.load(file) == [0.1, 0.2]
@@ -0,0 +1,130 @@
+import socket
+import threading
+from unittest import mock
+
+from pytocl.driver import Driver
+from pytocl.evaluation import EvaluationResult
+from pytocl.protocol import Client, State
+from pytocl.server import ReplayServer, ReplayReport, load_packets
+
+PACKETS = [
+    '(angle 0.1)(curLapTime {})(damage 0)(distFromStart 10)(distRaced 10)(fuel 90)(gear 1)'
+    '(lastLapTime 0)(racePos 1)(rpm 4000)(speedX 50)(speedY 0)(speedZ 0)(trackPos 0.1)'
+    '(z 0.3)'.format(0.02 * (i + 1)).encode()
+    for i in range(20)
+]
+
+
+def replay(driver, **kwargs):
+    """Runs a client with given driver against a replay server."""
+    server = ReplayServer(PACKETS, '127.0.0.1', 0, **kwargs)
+    reports = []
+    thread = threading.Thread(target=lambda: reports.append(server.serve(5)))
+    thread.start()
+
+    client = Client('127.0.0.1', server.address[1], driver=driver)
+    client.run()
+    thread.join()
+    server.close()
+
+    assert client.state is State.STOPPED
+    assert client.profiler.tick.count == reports[0].answered
+    return reports[0]
+
+
+def test_replay_as_fast_as_possible():
+    driver = mock.MagicMock(wraps=Driver(False))
+    driver.range_finder_angles = Driver(False).range_finder_angles
+
+    report = replay(driver, rate=0, timeout=1, repeat=2)
+
+    assert report.sent == 40
+    assert report.answered == 40
+    assert report.dropped == 0
+    assert driver.drive.call_count == 40
+    assert driver.on_shutdown.call_count == 1
+    assert 0 < report.percentile(50) <= report.percentile(99) <= max(report.latencies)
+
+
+def test_replay_restart_and_drops():
+    server = ReplayServer(PACKETS, '127.0.0.1', 0, rate=500, timeout=0.05, restart_every=10)
+    received = []
+
+    def client():
+        # raw client leaving every fifth message unanswered:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        def register():
+            sock.sendto(b'SCR-0(init 0)', server.address)
+            assert sock.recv(1000) == b'***identified***'
+
+        register()
+        while True:
+            buffer = sock.recv(1000)
+            received.append(buffer)
+            if buffer == b'***shutdown***':
+                break
+            if buffer == b'***restart***':
+                register()
+            elif len(received) % 5:
+                sock.sendto(b'(accel 1)', server.address)
+        sock.close()
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    report = server.serve(5)
+    thread.join()
+    server.close()
+
+    assert received.count(b'***restart***') == 1
+    assert report.sent == 20
+    assert report.dropped == 4
+    assert report.answered == 16
+    assert report.late == 0
+    assert report.drop_rate == 0.2
+
+
+def test_replay_restart_registers_client_again():
+    driver = mock.MagicMock(wraps=Driver(False))
+    driver.range_finder_angles = Driver(False).range_finder_angles
+
+    report = replay(driver, rate=0, timeout=1, restart_every=8)
+
+    assert report.sent == 20
+    assert report.answered == 20
+    assert driver.drive.call_count == 20
+    assert driver.on_restart.call_count == 2
+    assert driver.on_shutdown.call_count == 1
+
+
+def test_load_packets(tmpdir):
+    path = tmpdir.join('packets.txt')
+    path.write_binary(b'\n'.join(PACKETS[:3]) + b'\n\n')
+    assert load_packets(str(path)) == PACKETS[:3]
+
+
+def test_report_without_replies():
+    report = ReplayReport()
+    assert report.drop_rate == 0.0
+    assert 'sent: 0' in str(report)
+
+
+def test_client_returns_evaluation_result(tmpdir):
+    server = ReplayServer(PACKETS, '127.0.0.1', 0, rate=0, timeout=1)
+    thread = threading.Thread(target=lambda: server.serve(5))
+    thread.start()
+
+    fitness_file = tmpdir.join('fitness')
+    client = Client('127.0.0.1', server.address[1], driver=Driver(False),
+                    fitnessFile=str(fitness_file))
+    result = client.run()
+    thread.join()
+    server.close()
+
+    assert isinstance(result, EvaluationResult)
+    assert result.ticks == 20
+    assert result.distance == 10
+    assert result.lap_time == 0
+    assert not result.lap_complete
+    assert result.fitness == client.evaluation['fitness']
+    assert float(fitness_file.read()) == result.fitness
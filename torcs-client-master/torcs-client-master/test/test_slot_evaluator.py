@@ -0,0 +1,72 @@
+import time
+from collections import namedtuple
+
+import pytest
+
+from myneat.SlotEvaluator import SlotEvaluator, getSlots
+
+Result = namedtuple('Result', ['fitness', 'port', 'start', 'end'])
+
+
+class Genome:
+
+    def __init__(self, key, delay=0.0):
+        self.key = key
+        self.delay = delay
+        self.fitness = None
+
+
+def race(genome, config, slot):
+    start = time.time()
+    if genome.delay is None:
+        raise RuntimeError('server crashed')
+    time.sleep(genome.delay)
+    return Result(10.0 * genome.key, slot.port, start, time.time())
+
+
+def test_results_recorded_in_order_of_completion():
+    evaluator = SlotEvaluator(race, getSlots([3001, 3002]))
+    genomes = [(1, Genome(1, delay=0.5)), (2, Genome(2)), (3, Genome(3))]
+    finished = []
+
+    evaluator.evaluate_genomes(genomes, None, onResult=lambda genomeID, genome: finished.append(genomeID))
+    evaluator.close()
+
+    assert finished[-1] == 1
+    assert [genome.fitness for _, genome in genomes] == [10.0, 20.0, 30.0]
+    assert sorted(evaluator.results) == [1, 2, 3]
+
+
+def test_slots_never_shared():
+    slots = getSlots([3001, 3002], 'torcs -r race-{slot.index}.xml')
+    evaluator = SlotEvaluator(race, slots)
+    genomes = [(key, Genome(key, delay=0.05 * (key % 3))) for key in range(1, 8)]
+
+    evaluator.evaluate_genomes(genomes, None)
+    evaluator.close()
+
+    assert [genome.fitness for _, genome in genomes] == [10.0 * key for key in range(1, 8)]
+    for port in (3001, 3002):
+        races = sorted((result.start, result.end) for result in evaluator.results.values() if result.port == port)
+        assert all(end <= nextStart for (_, end), (nextStart, _) in zip(races, races[1:]))
+    assert {result.port for result in evaluator.results.values()} == {3001, 3002}
+
+
+def test_slot_carries_server_command():
+    slot, = getSlots([3005], 'torcs -r race-{slot.index}.xml')
+
+    assert slot.serverCommand.format(slot=slot) == 'torcs -r race-0.xml'
+    assert slot.fitnessFile == 'myneat/fitnessFile-3005' and slot.roadmapFile == 'roadmap-3005'
+
+
+def test_failed_evaluation_raises_and_frees_slot():
+    evaluator = SlotEvaluator(race, getSlots([3001]))
+
+    with pytest.raises(RuntimeError):
+        evaluator.evaluate_genomes([(1, Genome(1, delay=None))], None)
+
+    genomes = [(2, Genome(2)), (3, Genome(3))]
+    evaluator.evaluate_genomes(genomes, None)
+    evaluator.close()
+
+    assert [genome.fitness for _, genome in genomes] == [20.0, 30.0]
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from myneat.SuccessiveHalving import SuccessiveHalving, Rung, RUNG_OFFSET
+
+
+class Budget:
+    """Evaluation on a budget, fitness is the genome's skill times the budget."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.evaluated = []
+
+    def __call__(self, genomes, config):
+        for genomeID, genome in genomes:
+            self.evaluated.append(genomeID)
+            genome.fitness = genome.skill * self.budget
+
+
+def test_promotes_best_and_offsets():
+    genomes = [(i, SimpleNamespace(skill=i, fitness=None)) for i in range(8)]
+    budgets = [Budget(100), Budget(1000), Budget(10000)]
+    halving = SuccessiveHalving([Rung(budget, 0.5) for budget in budgets], offset=1e6)
+
+    halving.evaluate_genomes(genomes, None)
+
+    assert [sorted(b.evaluated) for b in budgets] == [list(range(8)), [4, 5, 6, 7], [6, 7]]
+    assert halving.evaluated == [8, 4, 2]
+
+    fitness = [genome.fitness for _, genome in genomes]
+    assert fitness == [0, 100, 200, 300, 1e6 + 4000, 1e6 + 5000, 2e6 + 60000, 2e6 + 70000]
+
+    assert halving.rawFitness == {0: 0, 1: 100, 2: 200, 3: 300, 4: 4000, 5: 5000, 6: 60000, 7: 70000}
+    assert halving.bestGenome.skill == 7 and halving.bestGenome.fitness == 70000
+
+
+def test_fitness_comparable_across_generations():
+    halving = SuccessiveHalving([Rung(Budget(1), 0.5), Rung(Budget(10), 0.5)], offset=1000)
+    first = [(i, SimpleNamespace(key=i, skill=i, fitness=None)) for i in range(4)]
+    second = [(i, SimpleNamespace(key=i, skill=i / 4, fitness=None)) for i in range(4, 8)]
+
+    halving.evaluate_genomes(first, None)
+    halving.evaluate_genomes(second, None)
+
+    # the weaker generation's best scores below the stronger one's:
+    assert max(g.fitness for _, g in second) < max(g.fitness for _, g in first)
+    assert halving.bestGenome.key == 3 and halving.bestGenome.fitness == 30
+    assert halving.raceFitness(second[-1][1]) == 17.5
+
+
+def test_keeps_at_least_one():
+    genomes = [(i, SimpleNamespace(skill=i, fitness=None)) for i in range(3)]
+    last = Budget(1)
+    SuccessiveHalving([Rung(Budget(1), 0.1), Rung(last, 0.1)], reporters=None).evaluate_genomes(genomes, None)
+
+    assert last.evaluated == [2]
+    assert genomes[2][1].fitness == RUNG_OFFSET + 2
@@ -0,0 +1,48 @@
+from unittest import mock
+
+from pytocl.timing import Histogram, TickProfiler
+
+
+def test_histogram_percentiles():
+    h = Histogram(bucket_ns=10, num_buckets=10)
+    for value in range(100):
+        h.add(value)
+    h.add(1000)
+
+    assert h.count == 101
+    assert h.max == 1000
+    assert h.counts[-1] == 1
+    assert h.percentile(50) == 60
+    assert h.percentile(99) == 100
+    assert h.percentile(100) == 1000
+    assert h.count_above(50) == 51
+
+
+def test_histogram_empty():
+    h = Histogram()
+    assert h.percentile(50) == 0
+    assert h.mean == 0
+
+
+@mock.patch('pytocl.timing.time.perf_counter_ns')
+def test_profiler_deadline_misses(mock_clock):
+    profiler = TickProfiler(deadline_ns=100, bucket_ns=10, num_buckets=100)
+
+    # fast tick, then one with slow driver:
+    mock_clock.side_effect = [0, 1, 2, 3, 13, 14, 15,
+                              100, 101, 102, 103, 303, 304, 305]
+    for _ in range(2):
+        profiler.begin()
+        for stage in ('decode', 'state', 'evaluate', 'drive', 'encode'):
+            profiler.lap(stage)
+        profiler.end()
+
+    assert profiler.tick.count == 2
+    assert profiler.misses == 1
+    assert profiler.stages['drive'].max == 200
+    assert profiler.stages['send'].count == 2
+
+    report = profiler.report()
+    assert 'drive' in report
+    assert '1 of 2 ticks exceeded' in report
+    assert 'drive() alone 1 times' in report
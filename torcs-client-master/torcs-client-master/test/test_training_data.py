@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader, BatchSampler, SequentialSampler
+
+from models.data import SteeringTrainingData
+
+COLUMNS = ['SPEED', 'TRACK_POSITION', 'ANGLE_TO_TRACK_AXIS'] + ['TRACK_EDGE_' + str(i) for i in range(19)] + ['STEERING']
+
+
+def frame(rows, start=0):
+    values = np.arange(start, start + rows * len(COLUMNS), dtype=float).reshape(rows, len(COLUMNS))
+    return pd.DataFrame(values, columns=COLUMNS)
+
+
+def test_items_are_tensor_rows():
+    data = SteeringTrainingData(frame(5))
+    data.append(frame(3, 1000))
+
+    inputs, targets = data[6]
+
+    assert len(data) == 8
+    assert inputs.dtype == torch.float32 and inputs.shape == (22,)
+    assert inputs[0] == 1000 + len(COLUMNS)
+    assert targets.tolist() == [((1000 + 2 * len(COLUMNS) - 1) + 1) / 2]
+
+
+def test_list_of_indices_is_batch():
+    data = SteeringTrainingData(frame(10))
+
+    inputs, targets = data[[9, 0, 4]]
+
+    assert inputs.shape == (3, 22) and targets.shape == (3, 1)
+    assert torch.equal(inputs[1], data[0][0])
+    assert torch.equal(targets[2], data[4][1])
+
+
+def test_append_after_access_rematerializes():
+    data = SteeringTrainingData(frame(2))
+    data[0]
+
+    data.append(frame(2, 100))
+
+    assert data[3][0][0] == 100 + len(COLUMNS)
+
+
+def test_batch_sampler_loading():
+    data = SteeringTrainingData(frame(10))
+    loader = DataLoader(data, sampler=BatchSampler(SequentialSampler(data), 4, drop_last=False), batch_size=None)
+
+    assert [len(inputs) for inputs, _ in loader] == [4, 4, 2]
+
+
+def test_append_files_in_order(tmpdir):
+    paths = []
+    for index in range(3):
+        path = str(tmpdir.join('track-{}.csv'.format(index)))
+        frame(index + 2, 1000 * index).to_csv(path, index=False)
+        paths.append(path)
+
+    data = SteeringTrainingData()
+    report = data.appendFiles(paths, numberOfWorkers=2)
+
+    assert len(data) == 2 + 3 + 4
+    assert [(path, rows) for path, rows, _, _ in report] == [(path, index + 2) for index, path in enumerate(paths)]
+    assert report[0][3] == (2 * 22 + 2) * 4
+    assert data[2][0][0] == 1000
+    assert data[5][0][0] == 2000
@@ -0,0 +1,83 @@
+import threading
+from unittest import mock
+
+import pytest
+
+from pytocl.car import Command
+from pytocl.driver import Driver
+from pytocl.protocol import Client
+from pytocl.watchdog import DeadlineDriver
+
+
+def carstate(time):
+    state = mock.MagicMock()
+    state.current_lap_time = time
+    state.distance_from_center = 0.5
+    state.speed_x = 10
+    state.rpm = 3000
+    state.gear = 1
+    return state
+
+
+class StallingDriver(Driver):
+    """Answers immediately unless told to stall."""
+
+    def __init__(self):
+        super().__init__(logdata=False)
+        self.release = threading.Event()
+        self.stall = False
+
+    def drive(self, carstate):
+        if self.stall:
+            self.release.wait(5)
+        command = Command()
+        command.steering = 0.42
+        return command
+
+
+def test_fallback_to_last_command():
+    driver = StallingDriver()
+    watchdog = DeadlineDriver(driver, 0.01)
+
+    assert watchdog.drive(carstate(1.0)).steering == 0.42
+
+    driver.stall = True
+    assert watchdog.drive(carstate(1.02)).steering == 0.42
+    # driver still busy:
+    assert watchdog.drive(carstate(1.04)).steering == 0.42
+    assert watchdog.fallbacks == 2
+
+    driver.stall = False
+    driver.release.set()
+    watchdog.on_shutdown()
+    assert watchdog.ticks == 3
+
+
+def test_fallback_to_pid():
+    driver = StallingDriver()
+    driver.stall = True
+    watchdog = DeadlineDriver(driver, 0.01, fallback='pid')
+
+    command = watchdog.drive(carstate(1.0))
+    assert command.steering != 0.42
+    assert command.steering < 0
+    assert watchdog.fallbacks == 1
+
+    driver.release.set()
+    watchdog.on_shutdown()
+
+
+def test_unknown_fallback():
+    with pytest.raises(ValueError):
+        DeadlineDriver(Driver(False), 0.01, fallback='brake')
+
+
+def test_client_deadline_mode():
+    driver = Driver(False)
+    assert Client(driver=driver).driver is driver
+
+    client = Client(driver=driver, deadline=0.008)
+    assert isinstance(client.driver, DeadlineDriver)
+    assert client.driver.driver is driver
+    assert client.driver.range_finder_angles == driver.range_finder_angles
+    client.driver.on_shutdown()